@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for the Deal Finder web app.
+
+Requests spend most of their time waiting on PostgreSQL, so we run several
+worker processes with a thread pool each (gthread). Tune with the
+GUNICORN_WORKERS / GUNICORN_THREADS environment variables.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 3000)}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+# gevent: greenlets per worker. They queue for the app's DB_POOL_MAX connections
+# (503 after DB_POOL_TIMEOUT) rather than each opening one
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Make psycopg2 yield to the gevent hub while waiting on the database."""
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
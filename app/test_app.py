@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the /api/deals page cursor and the no-database fallback in app.py
+
+The keyset paging test needs a scratch Postgres database: set TEST_DATABASE_URL to
+one without an app schema. It creates app.deals_enriched there and drops it after.
+"""
+
+import base64
+import os
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import app as app_module
+from app import decode_cursor, encode_cursor
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+class TestDealsCursor(unittest.TestCase):
+
+    def test_cursor_round_trips_row_key(self):
+        created_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        token = encode_cursor(created_at, 7, 'd:7:2:1:0')
+        self.assertEqual(decode_cursor(token), (created_at, 7, 'd:7:2:1:0'))
+
+    def test_cursor_without_row_key_is_rejected(self):
+        token = encode_cursor(datetime(2024, 5, 1, tzinfo=timezone.utc), 7, 'd:7:2:1:0')
+        for bad in ('garbage', 'W10', base64.urlsafe_b64encode(b'["2024-05-01T00:00:00+00:00",7]').decode(),
+                    token[:-4]):
+            with self.assertRaises(ValueError):
+                decode_cursor(bad)
+
+class TestFallbackResponses(unittest.TestCase):
+
+    def test_fallback_responses_are_not_cached(self):
+        client = app_module.app.test_client()
+        with mock.patch.object(app_module, 'get_db_pool', return_value=None):
+            for url, source in (('/api/deals?page_size=1&fallback_test=1', 'mock'), ('/api/stats', 'static')):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers['X-Data-Source'], source)
+                self.assertFalse(app_module.is_cacheable(response))
+        self.assertIsNone(app_module.cache.get('stats_v1'))
+
+    def test_busy_pool_answers_503_instead_of_mock_data(self):
+        client = app_module.app.test_client()
+        pool = mock.Mock()
+        with mock.patch.object(app_module, 'get_db_pool', return_value=pool), \
+                mock.patch.dict(app_module._db_pool_slots, primary=threading.BoundedSemaphore(1)), \
+                mock.patch.object(app_module, 'DB_POOL_TIMEOUT', 0.01):
+            held = app_module.get_db_connection()
+            response = client.get('/api/deals?page_size=1&busy_test=1')
+            app_module.release_db_connection(held)
+        self.assertEqual(response.status_code, 503)
+        self.assertNotIn('X-Data-Source', response.headers)
+        pool.putconn.assert_called_once_with(held)
+
+@unittest.skipUnless(TEST_DATABASE_URL, 'TEST_DATABASE_URL is not set')
+class TestDealsKeysetPaging(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        import psycopg2
+        cls.db_config = psycopg2.extensions.parse_dsn(TEST_DATABASE_URL)
+        conn = psycopg2.connect(**cls.db_config)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_namespace WHERE nspname = 'app'")
+            if cur.fetchone():
+                conn.close()
+                raise unittest.SkipTest('TEST_DATABASE_URL database already has an app schema')
+            types = {'id': 'BIGINT', 'created_at': 'TIMESTAMPTZ'}
+            columns = ', '.join(f"{column} {types.get(column, 'TEXT')}" for column in app_module.DEAL_COLUMNS)
+            cur.execute("CREATE SCHEMA app")
+            cur.execute(f"CREATE TABLE app.deals_enriched ({columns}, row_key TEXT PRIMARY KEY)")
+            # Deal 7 has two Zillow matches, so two rows share (created_at, id)
+            now = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+            cur.executemany(
+                "INSERT INTO app.deals_enriched (id, created_at, zillow_id, row_key) VALUES (%s, %s, %s, %s)",
+                [(8, now + timedelta(hours=1), None, 'd:8:1:0:0'),
+                 (7, now, 'z1', 'd:7:2:1:0'),
+                 (7, now, 'z2', 'd:7:2:2:0'),
+                 (6, now - timedelta(hours=1), None, 'd:6:3:0:0')])
+        cls.conn = conn
+        cls.saved_config = app_module.DB_CONFIG, app_module.DB_HOST_RO
+        app_module.DB_CONFIG, app_module.DB_HOST_RO = cls.db_config, None
+        app_module.close_db_pool()
+        app_module._db_pools.clear()
+        cls.client = app_module.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        app_module.close_db_pool()
+        app_module._db_pools.clear()
+        app_module.DB_CONFIG, app_module.DB_HOST_RO = cls.saved_config
+        with cls.conn.cursor() as cur:
+            cur.execute("DROP SCHEMA app CASCADE")
+        cls.conn.close()
+
+    def deals(self, response):
+        return [(deal['id'], deal['zillow_id']) for deal in response['deals']]
+
+    def test_cursor_page_splits_rows_sharing_created_at_and_id(self):
+        first = self.client.get('/api/deals?page_size=2').get_json()
+        self.assertEqual(self.deals(first), [(8, None), (7, 'z2')])
+        self.assertTrue(first['has_more'])
+        self.assertEqual(first['next_before_key'], 'd:7:2:2:0')
+
+        second = self.client.get(f"/api/deals?page_size=2&cursor={first['next_cursor']}").get_json()
+        self.assertEqual(self.deals(second), [(7, 'z1'), (6, None)])
+        self.assertFalse(second['has_more'])
+
+        offset = self.client.get('/api/deals?page_size=2&page=2').get_json()
+        self.assertEqual(self.deals(second), self.deals(offset))
+
+if __name__ == '__main__':
+    unittest.main()
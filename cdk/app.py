@@ -29,9 +29,9 @@ stack = DealFinderStack(
     pg_instance_class=ctx("pg_instance_class") or "t3.medium",
     db_name=ctx("db_name") or "deals",
     db_username=ctx("db_username") or "appuser",
-    db_password=ctx("db_password") or "REPLACE_ME_SECURELY",
     redis_version=ctx("redis_version") or "7.1",
     redis_node_type=ctx("redis_node_type") or "cache.t3.small",
+    pg_read_replica=str(ctx("pg_read_replica") or "false").lower() in ("true", "1", "yes"),
 )
 
 app.synth()
@@ -1,10 +1,10 @@
+from functools import lru_cache
 from typing import Optional
 
 from aws_cdk import (
     Stack,
     CfnOutput,
     Duration,
-    SecretValue,
     aws_ec2 as ec2,
     aws_iam as iam,
     aws_s3 as s3,
@@ -19,6 +19,12 @@ from aws_cdk import (
 from constructs import Construct
 
 
+@lru_cache(maxsize=None)
+def instance_type(instance_class: str) -> ec2.InstanceType:
+    # Context values look like "t3.medium"; anything unqualified falls back to t3.medium
+    return ec2.InstanceType(instance_class if "." in instance_class else "t3.medium")
+
+
 class DealFinderStack(Stack):
     def __init__(
         self,
@@ -39,9 +45,9 @@ class DealFinderStack(Stack):
         pg_instance_class: str,
         db_name: str,
         db_username: str,
-        db_password: str,
         redis_version: str,
         redis_node_type: str,
+        pg_read_replica: bool = False,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -60,6 +66,9 @@ class DealFinderStack(Stack):
                 ec2.SubnetConfiguration(name="private", subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS, cidr_mask=20),
             ],
         )
+        # Private (egress via NAT) subnets, resolved once and shared by ECS, RDS, Redis and the Lambda
+        private_subnets = vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS)
+        private_selection = ec2.SubnetSelection(subnets=private_subnets.subnets)
 
         # --------------------------
         # Security Groups
@@ -152,7 +161,7 @@ class DealFinderStack(Stack):
             task_definition=task_def,
             desired_count=desired_count,
             assign_public_ip=False,
-            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            vpc_subnets=private_selection,
             security_groups=[sg_ecs],
             service_name=f"{name}-svc",
         )
@@ -183,9 +192,9 @@ class DealFinderStack(Stack):
             self,
             "Pg",
             engine=rds.DatabaseInstanceEngine.postgres(version=rds.PostgresEngineVersion.of(pg_version)),
-            instance_type=ec2.InstanceType.of(ec2.InstanceClass.of(pg_instance_class.split(".")[0].upper()), ec2.InstanceSize.of(pg_instance_class.split(".")[1].upper())) if "." in pg_instance_class else ec2.InstanceType.of(ec2.InstanceClass.T3, ec2.InstanceSize.MEDIUM),
+            instance_type=instance_type(pg_instance_class),
             vpc=vpc,
-            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            vpc_subnets=private_selection,
             security_groups=[sg_rds],
             multi_az=True,
             allocated_storage=50,
@@ -195,10 +204,29 @@ class DealFinderStack(Stack):
             storage_encrypted=True,
             backup_retention=Duration.days(7),
             database_name=db_name,
-            credentials=rds.Credentials.from_password(db_username, SecretValue.unsafe_plain_text(db_password)),
+            # Password generated into Secrets Manager; ECS and the PostGIS Lambda read it at
+            # runtime, so it never appears in the task definition or function config
+            credentials=rds.Credentials.from_generated_secret(db_username, secret_name=f"{name}/{env_name}/db"),
             instance_identifier=f"{name}-pg",
         )
 
+        # Optional read replica: the app sends its read-only endpoints (/api/deals,
+        # /api/stats) to it through DB_HOST_RO, keeping dashboard reads off the writer
+        replica = None
+        if pg_read_replica:
+            replica = rds.DatabaseInstanceReadReplica(
+                self,
+                "PgReplica",
+                source_database_instance=db,
+                instance_type=instance_type(pg_instance_class),
+                vpc=vpc,
+                vpc_subnets=private_selection,
+                security_groups=[sg_rds],
+                publicly_accessible=False,
+                storage_encrypted=True,
+                instance_identifier=f"{name}-pg-ro",
+            )
+
         # Note: Enabling PostGIS requires connecting to the DB and running
         # CREATE EXTENSION postgis; You can implement a Lambda-backed Custom
         # Resource to run this after deploy, or do it via migration tooling.
@@ -210,7 +238,7 @@ class DealFinderStack(Stack):
             self,
             "RedisSubnets",
             description=f"Redis for {name}",
-            subnet_ids=[s.subnet_id for s in vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS).subnets],
+            subnet_ids=private_subnets.subnet_ids,
             cache_subnet_group_name=f"{name}-redis-subnets",
         )
 
@@ -233,10 +261,21 @@ class DealFinderStack(Stack):
 
         # Now that DB and Redis exist, wire container env
         container.add_environment("S3_RAW_BUCKET", bucket.bucket_name)
-        container.add_environment("REDIS_URL", f"redis://{redis.attr_primary_end_point_address}:6379")
+        # transit_encryption_enabled above means the endpoint only speaks TLS: rediss://.
+        # Keepalive plus a periodic health check lets redis-py replace connections the
+        # server or NAT dropped while idle instead of failing the next request on them.
         container.add_environment(
-            "DATABASE_URL", f"postgresql://{db_username}:{db_password}@{db.instance_endpoint.hostname}:5432/{db_name}"
+            "REDIS_URL",
+            f"rediss://{redis.attr_primary_end_point_address}:6379/0?socket_keepalive=true&health_check_interval=30",
         )
+        # The app assembles its connection from DB_* (see DB_CONFIG in app/app.py)
+        container.add_environment("DB_HOST", db.instance_endpoint.hostname)
+        container.add_environment("DB_PORT", "5432")
+        container.add_environment("DB_NAME", db_name)
+        container.add_environment("DB_USER", db_username)
+        container.add_secret("DB_PASSWORD", ecs.Secret.from_secrets_manager(db.secret, "password"))
+        if replica is not None:
+            container.add_environment("DB_HOST_RO", replica.instance_endpoint.hostname)
 
         # --------------------------
         # Lambda-backed Custom Resource to enable PostGIS
@@ -269,16 +308,17 @@ class DealFinderStack(Stack):
             ),
             timeout=Duration.minutes(2),
             vpc=vpc,
-            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            vpc_subnets=private_selection,
             security_groups=[sg_lambda],
             environment={
                 "DB_HOST": db.instance_endpoint.hostname,
                 "DB_PORT": "5432",
                 "DB_NAME": db_name,
                 "DB_USER": db_username,
-                "DB_PASSWORD": db_password,
+                "DB_SECRET_ARN": db.secret.secret_arn,
             },
         )
+        db.secret.grant_read(postgis_fn)
 
         postgis_provider = cr.Provider(
             self,
@@ -304,5 +344,8 @@ class DealFinderStack(Stack):
         CfnOutput(self, "alb_dns_name", value=alb.load_balancer_dns_name)
         CfnOutput(self, "service_url_http", value=f"http://{alb.load_balancer_dns_name}")
         CfnOutput(self, "rds_endpoint", value=db.instance_endpoint.hostname)
+        CfnOutput(self, "rds_secret_arn", value=db.secret.secret_arn)
+        if replica is not None:
+            CfnOutput(self, "rds_replica_endpoint", value=replica.instance_endpoint.hostname)
         CfnOutput(self, "redis_primary", value=redis.attr_primary_end_point_address)
         CfnOutput(self, "s3_raw_bucket_name", value=bucket.bucket_name)
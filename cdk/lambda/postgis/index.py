@@ -1,12 +1,24 @@
 import json
 import os
 import logging
-import pg8000
-import pathlib
+import time
+from functools import lru_cache
+
+# pg8000 and pathlib are imported where they are first needed, so INIT (and Delete
+# events, which never touch the database) only pay for the stdlib modules above
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Connection reused by warm invocations of this container, so they skip the TLS
+# handshake to RDS; pinged first if it has been idle longer than CONN_PING_AFTER_SECONDS
+_CONN = None
+_CONN_USED_AT = 0.0
+CONN_PING_AFTER_SECONDS = 60
+
+# Set once this container has seen the postgis extension installed
+_POSTGIS_READY = False
+
 
 def run_sql(conn, sql: str):
     with conn.cursor() as cur:
@@ -14,22 +26,12 @@ def run_sql(conn, sql: str):
         conn.commit()
 
 
-def split_statements(sql_text: str):
-    # naive split on semicolons; ignores empty fragments
-    parts = []
-    buff = []
-    for line in sql_text.splitlines():
-        buff.append(line)
-        if line.strip().endswith(";"):
-            stmt = "\n".join(buff).strip()
-            buff = []
-            if stmt:
-                parts.append(stmt)
-    # any trailing content
-    tail = "\n".join(buff).strip()
-    if tail:
-        parts.append(tail)
-    return parts
+def apply_migration(conn, migration_id: str, sql_text: str):
+    # Send the whole file plus its schema_migrations marker in one simple-query message.
+    # The server splits it itself (so DO $$ ... $$ bodies are fine) and runs it as one
+    # implicit transaction: one round trip and one commit, and no marker if it fails.
+    marker = "INSERT INTO schema_migrations(id) VALUES ('{}');".format(migration_id.replace("'", "''"))
+    conn.execute_simple(f"{sql_text}\n;\n{marker}")
 
 
 def ensure_migrations_table(conn):
@@ -44,35 +46,90 @@ def ensure_migrations_table(conn):
     )
 
 
-def has_run(conn, migration_id: str) -> bool:
+def applied_migrations(conn) -> set:
     with conn.cursor() as cur:
-        cur.execute("SELECT 1 FROM schema_migrations WHERE id = %s", (migration_id,))
-        row = cur.fetchone()
-        return bool(row)
+        cur.execute("SELECT id FROM schema_migrations")
+        return {row[0] for row in cur.fetchall()}
 
 
-def run_migrations_if_any(conn):
+@lru_cache(maxsize=1)
+def migration_files() -> tuple:
+    # The deployment package is immutable, so list the migration files once per container
+    import pathlib
+
     sql_dir = pathlib.Path(__file__).parent / "sql"
-    if not sql_dir.exists():
+    return tuple(sorted(sql_dir.glob("*.sql"))) if sql_dir.exists() else ()
+
+
+def run_migrations_if_any(conn):
+    files = migration_files()
+    if not files:
         return
     ensure_migrations_table(conn)
-    # run files in sorted order
-    for p in sorted(sql_dir.glob("*.sql")):
+    # one query for everything already applied; files are only read if still pending
+    applied = applied_migrations(conn)
+    conn.commit()  # close the read transaction; each file then runs in its own
+    pending = [p for p in files if p.name not in applied]
+    if not pending:
+        logger.info(f"All {len(files)} migrations already applied")
+        return
+    for p in pending:
         mid = p.name
-        if has_run(conn, mid):
-            logger.info(f"Skipping already applied migration {mid}")
-            continue
-        sql_text = p.read_text(encoding="utf-8")
-        for stmt in split_statements(sql_text):
-            with conn.cursor() as cur:
-                cur.execute(stmt)
-        conn.commit()
-        with conn.cursor() as cur:
-            cur.execute("INSERT INTO schema_migrations(id) VALUES (%s)", (mid,))
-        conn.commit()
+        apply_migration(conn, mid, p.read_text(encoding="utf-8"))
         logger.info(f"Applied migration {mid}")
 
 
+def ensure_postgis(conn):
+    # Check the catalog before issuing CREATE EXTENSION, and remember the answer for
+    # warm invocations: once installed it stays installed
+    global _POSTGIS_READY
+    if _POSTGIS_READY:
+        return
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")
+        installed = cur.fetchone() is not None
+    conn.commit()  # don't leave the reused connection idle in a transaction
+    if not installed:
+        run_sql(conn, "CREATE EXTENSION IF NOT EXISTS postgis;")
+    _POSTGIS_READY = True
+
+
+def drop_connection():
+    global _CONN
+    if _CONN is not None:
+        try:
+            _CONN.close()
+        except Exception:
+            pass
+        _CONN = None
+
+
+def db_password() -> str:
+    # Set directly for local runs; in AWS the stack passes the RDS secret's ARN instead
+    if "DB_PASSWORD" in os.environ:
+        return os.environ["DB_PASSWORD"]
+    import boto3  # provided by the Lambda runtime
+
+    secret = boto3.client("secretsmanager").get_secret_value(SecretId=os.environ["DB_SECRET_ARN"])
+    return json.loads(secret["SecretString"])["password"]
+
+
+def get_connection(host, port, dbname, user):
+    global _CONN, _CONN_USED_AT
+    if _CONN is not None and time.monotonic() - _CONN_USED_AT > CONN_PING_AFTER_SECONDS:
+        try:
+            run_sql(_CONN, "SELECT 1")
+        except Exception:
+            logger.info("Cached database connection is no longer usable; reconnecting")
+            drop_connection()
+    if _CONN is None:
+        import pg8000
+
+        _CONN = pg8000.connect(host=host, port=port, database=dbname, user=user, password=db_password(), ssl_context=True)
+    _CONN_USED_AT = time.monotonic()
+    return _CONN
+
+
 def handler(event, context):
     logger.info(f"Event: {json.dumps(event)}")
     request_type = event.get("RequestType") or event.get("RequestType".lower()) or event.get("requestType")
@@ -81,21 +138,19 @@ def handler(event, context):
     port = int(os.environ.get("DB_PORT", "5432"))
     dbname = os.environ["DB_NAME"]
     user = os.environ["DB_USER"]
-    password = os.environ["DB_PASSWORD"]
 
     # Only run on Create/Update; ignore Delete
     if request_type in ("Delete", "delete"):
         return {"PhysicalResourceId": f"postgis-{host}", "Status": "SUCCESS"}
 
     try:
-        conn = pg8000.connect(host=host, port=port, database=dbname, user=user, password=password, ssl_context=True)
+        conn = get_connection(host, port, dbname, user)
         # Ensure extension exists
-        run_sql(conn, "CREATE EXTENSION IF NOT EXISTS postgis;")
+        ensure_postgis(conn)
         # Run optional migrations if property provided
         props = event.get("ResourceProperties") or {}
         if str(props.get("RunMigrations", "false")).lower() in ("true", "1", "yes"):
             run_migrations_if_any(conn)
-        conn.close()
         return {
             "PhysicalResourceId": f"postgis-{host}",
             "Status": "SUCCESS",
@@ -103,4 +158,6 @@ def handler(event, context):
         }
     except Exception as e:
         logger.exception("Failed to enable PostGIS")
+        # Don't hand a connection in an unknown state to the next invocation
+        drop_connection()
         raise
@@ -0,0 +1,3 @@
+-- Geography expression index so radius searches (ST_DWithin on geom::geography,
+-- distance in meters) can use an index probe instead of scanning deals_enriched
+CREATE INDEX IF NOT EXISTS deals_enriched_geog_gix ON app.deals_enriched USING GIST ((geom::geography));
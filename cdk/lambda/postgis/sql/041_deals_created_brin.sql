@@ -0,0 +1,4 @@
+-- BRIN index for "recent deals" windows (created_at > now() - interval ...).
+-- created_at is append-only and follows insertion order, so a block-range
+-- index answers these predicates with a few heap ranges at a tiny size.
+CREATE INDEX IF NOT EXISTS deals_created_brin ON app.deals USING BRIN (created_at);
@@ -0,0 +1,11 @@
+-- Covering index for the /api/deals "newest first" listing. The INCLUDE columns let
+-- the price/source/score filters be checked from the index, so the unfiltered page
+-- is a bounded index scan instead of a full sort. Supersedes the plain created_at index.
+CREATE INDEX IF NOT EXISTS deals_enriched_created_score_idx
+    ON app.deals_enriched (created_at DESC) INCLUDE (match_score, price, source);
+DROP INDEX IF EXISTS app.deals_enriched_created_at_idx;
+
+-- Smaller partial index for the common "good matches only" filter (min_score >= 0.5)
+CREATE INDEX IF NOT EXISTS deals_enriched_created_good_match_idx
+    ON app.deals_enriched (created_at DESC) INCLUDE (match_score, price, source)
+    WHERE match_score >= 0.5;
@@ -0,0 +1,5 @@
+-- /api/deals accepts several sources (source = ANY(...)). A larger statistics target
+-- keeps every source in the column's most-common-values list, so per-source row
+-- estimates stay accurate when choosing between the source index and a scan.
+ALTER MATERIALIZED VIEW app.deals_enriched ALTER COLUMN source SET STATISTICS 1000;
+ANALYZE app.deals_enriched;
@@ -0,0 +1,6 @@
+-- Keyset pagination on /api/deals orders by (created_at DESC, id DESC) and seeks with
+-- (created_at, id) < (cursor). Matching the full sort key lets the seek and the
+-- LIMIT be answered from the index alone. Supersedes deals_enriched_created_score_idx.
+CREATE INDEX IF NOT EXISTS deals_enriched_created_id_idx
+    ON app.deals_enriched (created_at DESC, id DESC) INCLUDE (match_score, price, source);
+DROP INDEX IF EXISTS app.deals_enriched_created_score_idx;
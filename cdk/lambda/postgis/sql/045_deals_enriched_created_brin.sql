@@ -0,0 +1,6 @@
+-- BRIN index for the /api/stats "last 7 days" count, which get_stats runs live on the
+-- materialized view (deals_stats_mv only holds the figures that do not age).
+-- Rows land in the view roughly in deals.created_at order, so small ranges
+-- (32 pages) keep the summaries tight while the index stays a few KB.
+CREATE INDEX IF NOT EXISTS deals_enriched_created_brin
+    ON app.deals_enriched USING BRIN (created_at) WITH (pages_per_range = 32);
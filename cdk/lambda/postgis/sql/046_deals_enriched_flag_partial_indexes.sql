@@ -0,0 +1,18 @@
+-- Partial indexes for the boolean /api/deals filters and the matched-deals count.
+-- Each indexes only the rows where the flag holds, in listing order, so a filtered
+-- page is a short index walk and the indexes stay small enough to remain cached.
+CREATE INDEX IF NOT EXISTS deals_enriched_pool_idx
+    ON app.deals_enriched (created_at DESC, id DESC) WHERE has_pool;
+CREATE INDEX IF NOT EXISTS deals_enriched_gym_idx
+    ON app.deals_enriched (created_at DESC, id DESC) WHERE has_gym;
+CREATE INDEX IF NOT EXISTS deals_enriched_pet_friendly_idx
+    ON app.deals_enriched (created_at DESC, id DESC) WHERE pet_friendly;
+-- 038/039 already created deals_enriched_on_market_idx as a plain (on_market) btree;
+-- drop it so the partial index below is actually built instead of skipped
+DROP INDEX IF EXISTS app.deals_enriched_on_market_idx;
+CREATE INDEX IF NOT EXISTS deals_enriched_on_market_idx
+    ON app.deals_enriched (created_at DESC, id DESC) WHERE on_market;
+
+-- matched_deals in /api/stats counts zillow_id IS NOT NULL; index-only scan
+CREATE INDEX IF NOT EXISTS deals_enriched_matched_idx
+    ON app.deals_enriched (created_at DESC) WHERE zillow_id IS NOT NULL;
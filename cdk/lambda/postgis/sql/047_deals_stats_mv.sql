@@ -0,0 +1,14 @@
+-- Dashboard figures for /api/stats, precomputed so the endpoint reads one row instead
+-- of aggregating deals_enriched on every cache miss. Every job that refreshes
+-- deals_enriched refreshes this right after it; recent_deals is relative to that refresh.
+CREATE MATERIALIZED VIEW IF NOT EXISTS app.deals_stats_mv AS
+SELECT
+    1 AS id,
+    COUNT(*) AS total_deals,
+    COUNT(*) FILTER (WHERE created_at > now() - interval '7 days') AS recent_deals,
+    COUNT(*) FILTER (WHERE zillow_id IS NOT NULL) AS matched_deals,
+    AVG(match_score) AS avg_score
+FROM app.deals_enriched;
+
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY requires a unique index
+CREATE UNIQUE INDEX IF NOT EXISTS deals_stats_mv_id_idx ON app.deals_stats_mv (id);
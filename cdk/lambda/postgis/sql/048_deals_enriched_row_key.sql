@@ -0,0 +1,143 @@
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY keeps deals_enriched readable during a refresh,
+-- but needs a unique index over plain columns. id alone is not unique (it repeats once
+-- per match/contact row and across the deals/addresses halves), so the view is rebuilt
+-- with a row_key naming the source rows behind each row. Dropping the view also drops
+-- deals_stats_mv; both are recreated below with the indexes from 039-047.
+DROP MATERIALIZED VIEW IF EXISTS app.deals_enriched CASCADE;
+
+CREATE MATERIALIZED VIEW app.deals_enriched AS
+-- Native deals path
+SELECT
+    d.id,
+    d.title,
+    d.price,
+    d.url,
+    d.source,
+    d.created_at,
+    ST_X(dl.geom) AS lng,
+    ST_Y(dl.geom) AS lat,
+    dl.geom,
+    m.zillow_id,
+    m.match_score,
+    m.distance_meters,
+    m.price_diff_percent,
+    c.agent_name,
+    c.agent_phone,
+    c.agent_email,
+    c.brokerage,
+    d.city,
+    d.state,
+    d.county,
+    d.property_category,
+    d.property_type,
+    d.bedrooms,
+    d.bathrooms,
+    d.square_feet,
+    d.lot_size,
+    d.has_pool,
+    d.has_gym,
+    d.pet_friendly,
+    d.crime_rate,
+    d.flood_zone,
+    d.school_rating,
+    d.sewage_system,
+    d.on_market,
+    CONCAT_WS(':', 'd', d.id, COALESCE(dl.id, 0), COALESCE(m.id, 0), COALESCE(c.id, 0)) AS row_key
+FROM app.deals d
+LEFT JOIN app.deal_locations dl ON d.id = dl.deal_id
+LEFT JOIN app.deal_zillow_matches m ON d.id = m.deal_id
+LEFT JOIN app.zillow_contacts c ON d.id = c.deal_id AND m.zillow_id = c.zillow_id
+
+UNION ALL
+
+-- OpenAddresses as deal-like entries
+SELECT
+    da.id,
+    da.title,
+    da.price,
+    da.url,
+    da.source,
+    da.created_at,
+    da.lng,
+    da.lat,
+    da.geom,
+    da.zillow_id,
+    da.match_score,
+    da.distance_meters,
+    da.price_diff_percent,
+    da.agent_name,
+    da.agent_phone,
+    da.agent_email,
+    da.brokerage,
+    da.city,
+    da.state,
+    da.county,
+    da.property_category,
+    da.property_type,
+    da.bedrooms,
+    da.bathrooms,
+    da.square_feet,
+    da.lot_size,
+    da.has_pool,
+    da.has_gym,
+    da.pet_friendly,
+    da.crime_rate,
+    da.flood_zone,
+    da.school_rating,
+    da.sewage_system,
+    da.on_market,
+    CONCAT_WS(':', 'a', da.id) AS row_key
+FROM app.deals_from_addresses da;
+
+CREATE UNIQUE INDEX IF NOT EXISTS deals_enriched_row_key_idx ON app.deals_enriched (row_key);
+
+-- Indexes for common UI filters (039)
+CREATE INDEX IF NOT EXISTS deals_enriched_price_idx ON app.deals_enriched (price);
+CREATE INDEX IF NOT EXISTS deals_enriched_geom_gix ON app.deals_enriched USING GIST (geom);
+CREATE INDEX IF NOT EXISTS deals_enriched_source_idx ON app.deals_enriched (source);
+CREATE INDEX IF NOT EXISTS deals_enriched_score_idx ON app.deals_enriched (match_score DESC);
+CREATE INDEX IF NOT EXISTS deals_enriched_lat_lng_idx ON app.deals_enriched (lat, lng);
+CREATE INDEX IF NOT EXISTS deals_enriched_state_idx ON app.deals_enriched (state);
+CREATE INDEX IF NOT EXISTS deals_enriched_category_idx ON app.deals_enriched (property_category);
+
+-- Radius searches (040)
+CREATE INDEX IF NOT EXISTS deals_enriched_geog_gix ON app.deals_enriched USING GIST ((geom::geography));
+
+-- Listing order and keyset pagination (042, 044)
+CREATE INDEX IF NOT EXISTS deals_enriched_created_id_idx
+    ON app.deals_enriched (created_at DESC, id DESC) INCLUDE (match_score, price, source);
+CREATE INDEX IF NOT EXISTS deals_enriched_created_good_match_idx
+    ON app.deals_enriched (created_at DESC) INCLUDE (match_score, price, source)
+    WHERE match_score >= 0.5;
+
+-- Live "last 7 days" count in /api/stats (045, 052)
+CREATE INDEX IF NOT EXISTS deals_enriched_created_brin
+    ON app.deals_enriched USING BRIN (created_at) WITH (pages_per_range = 32);
+
+-- Boolean filters and the matched-deals count (046)
+CREATE INDEX IF NOT EXISTS deals_enriched_pool_idx
+    ON app.deals_enriched (created_at DESC, id DESC) WHERE has_pool;
+CREATE INDEX IF NOT EXISTS deals_enriched_gym_idx
+    ON app.deals_enriched (created_at DESC, id DESC) WHERE has_gym;
+CREATE INDEX IF NOT EXISTS deals_enriched_pet_friendly_idx
+    ON app.deals_enriched (created_at DESC, id DESC) WHERE pet_friendly;
+CREATE INDEX IF NOT EXISTS deals_enriched_on_market_idx
+    ON app.deals_enriched (created_at DESC, id DESC) WHERE on_market;
+CREATE INDEX IF NOT EXISTS deals_enriched_matched_idx
+    ON app.deals_enriched (created_at DESC) WHERE zillow_id IS NOT NULL;
+
+-- Per-source estimates (043)
+ALTER MATERIALIZED VIEW app.deals_enriched ALTER COLUMN source SET STATISTICS 1000;
+ANALYZE app.deals_enriched;
+
+-- /api/stats figures (047)
+CREATE MATERIALIZED VIEW IF NOT EXISTS app.deals_stats_mv AS
+SELECT
+    1 AS id,
+    COUNT(*) AS total_deals,
+    COUNT(*) FILTER (WHERE created_at > now() - interval '7 days') AS recent_deals,
+    COUNT(*) FILTER (WHERE zillow_id IS NOT NULL) AS matched_deals,
+    AVG(match_score) AS avg_score
+FROM app.deals_enriched;
+
+CREATE UNIQUE INDEX IF NOT EXISTS deals_stats_mv_id_idx ON app.deals_stats_mv (id);
@@ -0,0 +1,14 @@
+-- cross_reference_zillow upserts matches ON CONFLICT (deal_id, zillow_id), so a rerun
+-- updates the scores in place instead of piling up duplicate rows. Keep the newest row
+-- of any pair saved more than once before the unique index goes on.
+DELETE FROM app.deal_zillow_matches m
+USING app.deal_zillow_matches newer
+WHERE newer.deal_id = m.deal_id
+  AND newer.zillow_id = m.zillow_id
+  AND newer.id > m.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS deal_zillow_matches_deal_zillow_key
+    ON app.deal_zillow_matches (deal_id, zillow_id);
+
+-- The unique index leads with deal_id, so it serves the lookups this one did
+DROP INDEX IF EXISTS app.deal_zillow_matches_deal_id_idx;
@@ -0,0 +1,14 @@
+-- cross_reference_zillow upserts contacts ON CONFLICT (deal_id, zillow_id), matching the
+-- deal_zillow_matches upsert from 049. Keep the newest row of any pair saved more than
+-- once before the unique index goes on.
+DELETE FROM app.zillow_contacts c
+USING app.zillow_contacts newer
+WHERE newer.deal_id = c.deal_id
+  AND newer.zillow_id = c.zillow_id
+  AND newer.id > c.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS zillow_contacts_deal_zillow_key
+    ON app.zillow_contacts (deal_id, zillow_id);
+
+-- The unique index leads with deal_id, so it serves the lookups this one did
+DROP INDEX IF EXISTS app.zillow_contacts_deal_id_idx;
@@ -0,0 +1,7 @@
+-- /api/deals now orders by (created_at DESC, id DESC, row_key DESC) and seeks with
+-- (created_at, id, row_key) < (cursor), since id alone repeats across match/contact rows.
+-- Carry row_key in the listing index so the seek and the LIMIT still come from the
+-- index alone. Supersedes deals_enriched_created_id_idx (044, 048).
+CREATE INDEX IF NOT EXISTS deals_enriched_listing_idx
+    ON app.deals_enriched (created_at DESC, id DESC, row_key DESC) INCLUDE (match_score, price, source);
+DROP INDEX IF EXISTS app.deals_enriched_created_id_idx;
@@ -0,0 +1,16 @@
+-- recent_deals in deals_stats_mv was counted against now() at refresh time, so without
+-- a refresh (no import or cross-reference run) the "last 7 days" figure never decayed.
+-- /api/stats now counts it live on deals_enriched through deals_enriched_created_brin
+-- (045), and the view keeps only the figures that change with the data itself.
+DROP MATERIALIZED VIEW IF EXISTS app.deals_stats_mv;
+
+CREATE MATERIALIZED VIEW app.deals_stats_mv AS
+SELECT
+    1 AS id,
+    COUNT(*) AS total_deals,
+    COUNT(*) FILTER (WHERE zillow_id IS NOT NULL) AS matched_deals,
+    AVG(match_score) AS avg_score
+FROM app.deals_enriched;
+
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY requires a unique index
+CREATE UNIQUE INDEX IF NOT EXISTS deals_stats_mv_id_idx ON app.deals_stats_mv (id);
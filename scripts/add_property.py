@@ -5,8 +5,25 @@ Script to add individual properties to the database
 
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 import os
+import io
+import csv
 import json
+import atexit
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Optional: stream large JSON arrays instead of loading the whole file
+try:
+    import ijson
+    HAS_IJSON = True
+    JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError)
+except ImportError:
+    HAS_IJSON = False
+    JSON_ERRORS = (json.JSONDecodeError,)
 
 # Database configuration
 DB_CONFIG = {
@@ -17,118 +34,322 @@ DB_CONFIG = {
     'password': os.environ.get('DB_PASSWORD', ''),
 }
 
-def get_db_connection():
-    """Get database connection."""
+# Batches are inserted with one statement: the rows arrive as parallel arrays, draw
+# their ids from app.deals' own sequence, and fill app.deals and app.deal_locations
+# from the same CTE, so no RETURNING round trip sits between the two inserts
+INSERT_PROPERTIES_SQL = """
+    WITH staged AS (
+        SELECT nextval(pg_get_serial_sequence('app.deals', 'id')) AS id, t.*
+        FROM unnest(%s::text[], %s::numeric[], %s::text[], %s::text[],
+                    %s::float8[], %s::float8[])
+             WITH ORDINALITY AS t(title, price, url, source, lng, lat, ord)
+    ), new_deals AS (
+        INSERT INTO app.deals (id, title, price, url, source)
+        SELECT id, title, price, url, source FROM staged
+    ), new_locations AS (
+        INSERT INTO app.deal_locations (deal_id, geom)
+        SELECT id, ST_SetSRID(ST_MakePoint(lng, lat), 4326) FROM staged
+    )
+    SELECT id FROM staged ORDER BY ord
+"""
+
+# The batch insert is PREPAREd once per pooled connection and then only EXECUTEd, so
+# repeated batches skip parse and plan. Prepared statements live in the database
+# session; set DB_PREPARE_STATEMENTS=0 behind pgbouncer in transaction mode.
+DB_PREPARE_STATEMENTS = os.environ.get('DB_PREPARE_STATEMENTS', '1') == '1'
+PREPARE_PROPERTIES_SQL = "PREPARE add_properties AS " + INSERT_PROPERTIES_SQL % tuple(f"${i}" for i in range(1, 7))
+EXECUTE_PROPERTIES_SQL = "EXECUTE add_properties (%s, %s, %s, %s, %s, %s)"
+
+# Larger batches are streamed with COPY into a temp staging table instead, which draws
+# its ids the same way and fills both tables with one INSERT ... SELECT each.
+COPY_THRESHOLD = 500
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE deals_staging (
+        id BIGINT DEFAULT nextval(pg_get_serial_sequence('app.deals', 'id')),
+        title TEXT, price NUMERIC, url TEXT, source TEXT,
+        lng DOUBLE PRECISION, lat DOUBLE PRECISION
+    ) ON COMMIT DROP
+"""
+# csv.writer writes '' and None alike as an empty field, which COPY reads as NULL;
+# FORCE_NOT_NULL keeps an empty title an empty string, as the INSERT path stores it
+COPY_STAGING_SQL = ("COPY deals_staging (title, price, url, source, lng, lat) FROM STDIN"
+                    " WITH (FORMAT CSV, FORCE_NOT_NULL (title))")
+INSERT_STAGED_DEALS_SQL = """
+    INSERT INTO app.deals (id, title, price, url, source)
+    SELECT id, title, price, url, source FROM deals_staging
+"""
+INSERT_STAGED_LOCATIONS_SQL = """
+    INSERT INTO app.deal_locations (deal_id, geom)
+    SELECT id, ST_SetSRID(ST_MakePoint(lng, lat), 4326) FROM deals_staging
+"""
+
+REQUIRED_FIELDS = frozenset({'title', 'price', 'lat', 'lng', 'city', 'state'})
+
+# Defaults for optional fields
+PROPERTY_DEFAULTS = {
+    'url': None,
+    'source': 'manual',
+    'county': None,
+    'property_category': 'residential',
+    'property_type': 'house',
+    'bedrooms': None,
+    'bathrooms': None,
+    'square_feet': None,
+    'lot_size': None,
+    'has_pool': False,
+    'has_gym': False,
+    'pet_friendly': False,
+    'crime_rate': 'medium',
+    'flood_zone': 'X',
+    'school_rating': None,
+    'sewage_system': 'municipal',
+    'on_market': True
+}
+
+# Properties are read, validated and inserted this many at a time
+IMPORT_CHUNK_SIZE = 1000
+
+# Connection pool, created on first use; every insert borrows from it instead of
+# opening (and authenticating) a fresh connection
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 8))
+_db_pool = None
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers which statements it has PREPAREd."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+def get_db_pool():
+    """Get (or create) the connection pool."""
+    global _db_pool
+    if _db_pool is None:
+        try:
+            _db_pool = psycopg2.pool.ThreadedConnectionPool(
+                DB_POOL_MIN, DB_POOL_MAX, connection_factory=PreparingConnection, **DB_CONFIG)
+        except Exception as e:
+            print(f"Database connection failed: {e}")
+            return None
+    return _db_pool
+
+# Chunks inserted in parallel by add_property_from_json, each on its own pooled connection
+IMPORT_WORKERS = max(1, min(int(os.environ.get('IMPORT_WORKERS', 4)), DB_POOL_MAX))
+
+@contextmanager
+def db_conn():
+    """Borrow a pooled connection for a with-block; yields None when the database is unavailable."""
+    pool = get_db_pool()
+    conn = pool.getconn() if pool else None
     try:
-        return psycopg2.connect(**DB_CONFIG)
-    except Exception as e:
-        print(f"Database connection failed: {e}")
+        yield conn
+    finally:
+        if conn is not None:
+            pool.putconn(conn)
+
+@atexit.register
+def close_db_pool():
+    """Close every pooled connection on exit."""
+    if _db_pool is not None and not _db_pool.closed:
+        _db_pool.closeall()
+
+def normalize_property(property_data):
+    """Check required fields and fill in defaults; returns None (after reporting why) if invalid."""
+    missing = REQUIRED_FIELDS - property_data.keys()
+    if missing:
+        print(f"Error: Missing required field(s) {', '.join(sorted(missing))}")
         return None
 
+    prop = {**PROPERTY_DEFAULTS, **property_data}
+    # JSON may give these as strings; the prepared insert's numeric[]/float8[] parameters
+    # only accept numbers, and one string in a batch would turn the whole array into text
+    try:
+        prop['price'] = Decimal(str(prop['price']))
+        prop['lat'], prop['lng'] = float(prop['lat']), float(prop['lng'])
+    except (ArithmeticError, TypeError, ValueError):
+        print("Error: price, lat and lng must be numbers")
+        return None
+    return prop
+
+def copy_properties(cur, properties):
+    """Insert normalized properties through COPY and a staging table; returns their deal ids in order."""
+    buf = io.StringIO()
+    csv.writer(buf).writerows(
+        (p['title'], p['price'], p['url'], p['source'], p['lng'], p['lat']) for p in properties
+    )
+    buf.seek(0)
+
+    cur.execute(CREATE_STAGING_SQL)
+    cur.copy_expert(COPY_STAGING_SQL, buf)
+    cur.execute(INSERT_STAGED_DEALS_SQL)
+    cur.execute(INSERT_STAGED_LOCATIONS_SQL)
+    # ids were drawn from the sequence in COPY order
+    cur.execute("SELECT id FROM deals_staging ORDER BY id")
+    deal_ids = [row[0] for row in cur.fetchall()]
+    # Drop it now so the next batch in this transaction can stage again
+    cur.execute("DROP TABLE deals_staging")
+    return deal_ids
+
+def insert_properties(cur, properties):
+    """Insert normalized properties in one statement (COPY for large batches); returns their deal ids in order."""
+    if len(properties) > COPY_THRESHOLD:
+        return copy_properties(cur, properties)
+
+    params = (
+        [p['title'] for p in properties],
+        [p['price'] for p in properties],
+        [p['url'] for p in properties],
+        [p['source'] for p in properties],
+        [p['lng'] for p in properties],
+        [p['lat'] for p in properties],
+    )
+    if DB_PREPARE_STATEMENTS:
+        if 'add_properties' not in cur.connection.prepared:
+            # PREPARE is not transactional, so it survives a rollback of this batch
+            cur.execute(PREPARE_PROPERTIES_SQL)
+            cur.connection.prepared.add('add_properties')
+        cur.execute(EXECUTE_PROPERTIES_SQL, params)
+    else:
+        cur.execute(INSERT_PROPERTIES_SQL, params)
+    return [row[0] for row in cur.fetchall()]
+
 def add_property(property_data):
     """Add a single property to the database."""
-    required_fields = ['title', 'price', 'lat', 'lng', 'city', 'state']
+    property_data = normalize_property(property_data)
+    if property_data is None:
+        return False
 
-    for field in required_fields:
-        if field not in property_data:
-            print(f"Error: Missing required field '{field}'")
+    with db_conn() as conn:
+        if not conn:
             return False
 
-    # Set defaults for optional fields
-    defaults = {
-        'url': None,
-        'source': 'manual',
-        'county': None,
-        'property_category': 'residential',
-        'property_type': 'house',
-        'bedrooms': None,
-        'bathrooms': None,
-        'square_feet': None,
-        'lot_size': None,
-        'has_pool': False,
-        'has_gym': False,
-        'pet_friendly': False,
-        'crime_rate': 'medium',
-        'flood_zone': 'X',
-        'school_rating': None,
-        'sewage_system': 'municipal',
-        'on_market': True
-    }
-
-    for key, default_value in defaults.items():
-        if key not in property_data:
-            property_data[key] = default_value
-
-    conn = get_db_connection()
-    if not conn:
-        return False
+        try:
+            with conn.cursor() as cur:
+                deal_id, = insert_properties(cur, [property_data])
 
-    try:
-        with conn.cursor() as cur:
-            # Insert into deals table
-            cur.execute("""
-                INSERT INTO app.deals (title, price, url, source)
-                VALUES (%s, %s, %s, %s)
-                RETURNING id
-            """, (
-                property_data['title'],
-                property_data['price'],
-                property_data['url'],
-                property_data['source']
-            ))
-
-            deal_id = cur.fetchone()[0]
-
-            # Insert location
-            cur.execute("""
-                INSERT INTO app.deal_locations (deal_id, geom)
-                VALUES (%s, ST_SetSRID(ST_MakePoint(%s, %s), 4326))
-            """, (deal_id, property_data['lng'], property_data['lat']))
-
-            # Insert additional property data if it exists in the deals table
-            # Note: The current schema is minimal, you may need to extend it
+                # Insert additional property data if it exists in the deals table
+                # Note: The current schema is minimal, you may need to extend it
 
-            conn.commit()
-            print(f"✅ Property added successfully! ID: {deal_id}")
-            print(f"   Title: {property_data['title']}")
-            print(f"   Price: ${property_data['price']:,}")
-            print(f"   Location: {property_data['city']}, {property_data['state']}")
-            return True
+                conn.commit()
+                print(f"✅ Property added successfully! ID: {deal_id}")
+                print(f"   Title: {property_data['title']}")
+                print(f"   Price: ${property_data['price']:,}")
+                print(f"   Location: {property_data['city']}, {property_data['state']}")
+                return True
 
-    except Exception as e:
-        print(f"❌ Failed to add property: {e}")
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
+        except Exception as e:
+            print(f"❌ Failed to add property: {e}")
+            conn.rollback()
+            return False
 
-def add_property_from_json(json_file):
-    """Add properties from a JSON file."""
-    try:
-        with open(json_file, 'r') as f:
-            properties = json.load(f)
+def read_properties(f):
+    """Yield the properties in a JSON file (binary mode) holding one object or an array of them.
 
-        if isinstance(properties, dict):
-            properties = [properties]  # Single property
-        elif not isinstance(properties, list):
-            print("❌ JSON file must contain an object or array of objects")
-            return False
+    Arrays are streamed item by item when ijson is installed, so memory use does not
+    grow with the file.
+    """
+    first = f.read(1)
+    while first.isspace():
+        first = f.read(1)
+    f.seek(0)
+
+    if first == b'[' and HAS_IJSON:
+        yield from ijson.items(f, 'item', use_float=True)
+        return
 
-        success_count = 0
-        for i, prop in enumerate(properties):
-            print(f"\n📝 Adding property {i+1}/{len(properties)}...")
-            if add_property(prop):
-                success_count += 1
+    properties = json.load(f)
+    if isinstance(properties, dict):
+        yield properties  # Single property
+    elif isinstance(properties, list):
+        yield from properties
+    else:
+        print("❌ JSON file must contain an object or array of objects")
 
-        print(f"\n✅ Successfully added {success_count}/{len(properties)} properties")
-        return success_count > 0
+def validated_chunks(records):
+    """Yield (records read, normalized valid properties) for each IMPORT_CHUNK_SIZE slice of records."""
+    seen = 0
+    while chunk := list(islice(records, IMPORT_CHUNK_SIZE)):
+        valid = []
+        append = valid.append
+        for prop in chunk:
+            seen += 1
+            prop = normalize_property(prop)
+            if prop is not None:
+                append(prop)
+            else:
+                print(f"   Skipping property {seen}")
+        yield len(chunk), valid
+
+def insert_chunk(properties):
+    """Insert a chunk on its own pooled connection and transaction; returns how many were added."""
+    with db_conn() as conn:
+        try:
+            with conn.cursor() as cur:
+                insert_properties(cur, properties)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return len(properties)
+
+def add_property_from_json(json_file):
+    """Add properties from a JSON file.
+
+    With IMPORT_WORKERS=1 the whole file is one transaction. With more workers, chunks
+    are inserted in parallel and each commits on its own, so a failure part-way through
+    keeps the chunks already added.
+    """
+    if get_db_pool() is None:
+        return False
+
+    total = added = 0
+    try:
+        with open(json_file, 'rb') as f:
+            chunks = validated_chunks(read_properties(f))
+            if IMPORT_WORKERS > 1:
+                with ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as executor:
+                    pending = set()
+                    for read, valid in chunks:
+                        total += read
+                        if not valid:
+                            continue
+                        # Bound the chunks held in memory while parsing runs ahead
+                        if len(pending) >= IMPORT_WORKERS:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            added += sum(future.result() for future in done)
+                        pending.add(executor.submit(insert_chunk, valid))
+                    added += sum(future.result() for future in pending)
+            else:
+                with db_conn() as conn:
+                    try:
+                        with conn.cursor() as cur:
+                            for read, valid in chunks:
+                                total += read
+                                if valid:
+                                    insert_properties(cur, valid)
+                                    added += len(valid)
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
 
     except FileNotFoundError:
         print(f"❌ File not found: {json_file}")
         return False
-    except json.JSONDecodeError as e:
+    except JSON_ERRORS as e:
         print(f"❌ Invalid JSON: {e}")
         return False
+    except Exception as e:
+        print(f"❌ Failed to add properties: {e}")
+        return False
+
+    if not added:
+        print(f"\n❌ No valid properties in {json_file}")
+        return False
+
+    print(f"\n✅ Successfully added {added}/{total} properties")
+    return True
 
 # Example usage
 if __name__ == '__main__':
@@ -6,15 +6,32 @@ Supports CSV, JSON, and API data sources
 
 import psycopg2
 import psycopg2.extras
+from psycopg2 import sql
 import pandas as pd
 import json
 import csv
+import io
 import os
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import List, Dict, Any
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
 import logging
 from datetime import datetime
 
+# Optional: faster parsing for JSON files that fit in memory, streaming for those that don't
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,9 +45,107 @@ DB_CONFIG = {
     'password': os.environ.get('DB_PASSWORD', ''),
 }
 
+# Batches are streamed in with COPY. Ids are drawn from app.deals' sequence up front
+# so deals and deal_locations can both be copied without a RETURNING round trip.
+NEXT_DEAL_IDS_SQL = "SELECT nextval(pg_get_serial_sequence('app.deals', 'id')) FROM generate_series(1, %s)"
+# csv.writer writes '' like None, as an empty field that COPY reads as NULL; FORCE_NOT_NULL
+# keeps an empty title an empty string (app.deals.title is NOT NULL), as INSERT stores it
+COPY_DEALS_SQL = "COPY app.deals (id, title, price, url, source) FROM STDIN WITH (FORMAT CSV, FORCE_NOT_NULL (title))"
+COPY_LOCATIONS_SQL = "COPY app.deal_locations (deal_id, geom) FROM STDIN WITH (FORMAT CSV)"
+
+# --raw-copy: PostgreSQL parses the CSV itself into an all-text staging table, then one
+# statement validates the rows and inserts deals and locations; no Python row loop at all
+CREATE_STAGING_SQL = "CREATE TEMP TABLE deals_staging ({columns}) ON COMMIT DROP"
+COPY_STAGING_SQL = "COPY deals_staging FROM STDIN WITH (FORMAT CSV, HEADER true)"
+NUMBER_PATTERN = r'^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$'
+INSERT_FROM_STAGING_SQL = """
+    WITH valid AS (
+        SELECT nextval(pg_get_serial_sequence('app.deals', 'id')) AS id,
+               title, price::numeric AS price, {url} AS url, COALESCE({source}, 'bulk_import') AS source,
+               lng::float8 AS lng, lat::float8 AS lat
+        FROM deals_staging
+        WHERE {complete} AND price ~ %(number)s AND lat ~ %(number)s AND lng ~ %(number)s
+    ), deals AS (
+        INSERT INTO app.deals (id, title, price, url, source)
+        SELECT id, title, price, url, source FROM valid
+    )
+    INSERT INTO app.deal_locations (deal_id, geom)
+    SELECT id, ST_SetSRID(ST_MakePoint(lng, lat), 4326) FROM valid
+"""
+
+# --fast-load: these tables' secondary indexes are dropped for the load and rebuilt once
+# at the end, one sorted build each instead of an index update per inserted row. Primary
+# keys and unique indexes stay, so ids and foreign keys are still checked
+FAST_LOAD_TABLES = ['app.deals', 'app.deal_locations']
+SECONDARY_INDEXES_SQL = """
+    SELECT format('%%I.%%I', n.nspname, c.relname), pg_get_indexdef(i.indexrelid)
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE i.indrelid = ANY(%s::regclass[]) AND NOT i.indisunique AND NOT i.indisprimary
+"""
+# The dropped indexes' definitions are saved in the same transaction as the drops and
+# deleted as each index is rebuilt, so a killed load or a failed rebuild leaves them here
+# to be rebuilt by the next --fast-load run
+CREATE_FAST_LOAD_INDEXES_SQL = """
+    CREATE TABLE IF NOT EXISTS app.fast_load_indexes (name TEXT PRIMARY KEY, definition TEXT NOT NULL)
+"""
+SAVE_FAST_LOAD_INDEXES_SQL = """
+    INSERT INTO app.fast_load_indexes (name, definition) VALUES %s
+    ON CONFLICT (name) DO UPDATE SET definition = EXCLUDED.definition
+"""
+
+# Fallback for databases where COPY is not an option (e.g. per-row triggers on app.deals):
+# one multi-row INSERT per table per batch
+INSERT_DEALS_VALUES_SQL = "INSERT INTO app.deals (title, price, url, source) VALUES %s RETURNING id"
+INSERT_LOCATIONS_VALUES_SQL = "INSERT INTO app.deal_locations (deal_id, geom) VALUES %s"
+LOCATION_VALUES_TEMPLATE = "(%s, ST_SetSRID(ST_MakePoint(%s, %s), 4326))"
+
+REQUIRED_FIELDS = ['title', 'price', 'lat', 'lng', 'city', 'state']
+
+# Defaults for optional fields
+PROPERTY_DEFAULTS = {
+    'url': None,
+    'source': 'bulk_import',
+    'county': None,
+    'property_category': 'residential',
+    'property_type': 'house',
+    'bedrooms': None,
+    'bathrooms': None,
+    'square_feet': None,
+    'lot_size': None,
+    'has_pool': False,
+    'has_gym': False,
+    'pet_friendly': False,
+    'crime_rate': 'medium',
+    'flood_zone': 'X',
+    'school_rating': None,
+    'sewage_system': 'municipal',
+    'on_market': True
+}
+
+# Column order of the row tuples handed to the insert paths
+INSERT_COLUMNS = ['title', 'price', 'url', 'source', 'lng', 'lat']
+
+# JSON arrays larger than this are streamed with ijson rather than parsed whole
+JSON_STREAM_THRESHOLD = 256 * 1024 * 1024
+
+# CSV columns worth parsing; anything else in the file is skipped at read time
+CSV_COLUMNS = frozenset(REQUIRED_FIELDS) | PROPERTY_DEFAULTS.keys()
+
+def _record_batches(records: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[pd.DataFrame]:
+    """Turn property dicts into DataFrames of batch_size rows, so only one batch is ever tabulated at a time."""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            return
+        yield pd.DataFrame.from_records(chunk)
+
 class PropertyImporter:
-    def __init__(self):
+    def __init__(self, use_copy: bool = True):
         self.conn = None
+        self.use_copy = use_copy
         self.connect()
 
     def connect(self):
@@ -42,131 +157,149 @@ class PropertyImporter:
             logger.error(f"❌ Database connection failed: {e}")
             raise
 
+    @contextmanager
+    def fast_load(self):
+        """Drop FAST_LOAD_TABLES' secondary indexes and relax durability for the duration; rebuild them after."""
+        with self.conn.cursor() as cur:
+            cur.execute(CREATE_FAST_LOAD_INDEXES_SQL)
+        self.conn.commit()
+        # Indexes a previous load dropped but never got to rebuild
+        self.rebuild_fast_load_indexes()
+
+        with self.conn.cursor() as cur:
+            cur.execute(SECONDARY_INDEXES_SQL, (FAST_LOAD_TABLES,))
+            indexes = cur.fetchall()
+            if indexes:
+                psycopg2.extras.execute_values(cur, SAVE_FAST_LOAD_INDEXES_SQL, indexes)
+            for name, definition in indexes:
+                logger.info(f"Dropping index for the load: {definition}")
+                cur.execute(f"DROP INDEX {name}")
+            # Session-wide rather than SET LOCAL: the batches commit one by one
+            cur.execute("SET synchronous_commit = off")
+            cur.execute("SET maintenance_work_mem = '1GB'")
+        self.conn.commit()
+
+        try:
+            yield
+        finally:
+            self.conn.rollback()
+            logger.info(f"Rebuilding {len(indexes)} indexes...")
+            self.rebuild_fast_load_indexes()
+            with self.conn.cursor() as cur:
+                cur.execute("RESET synchronous_commit")
+                cur.execute("RESET maintenance_work_mem")
+            self.conn.commit()
+
+    def rebuild_fast_load_indexes(self) -> int:
+        """Recreate the indexes saved in app.fast_load_indexes, each in its own transaction; returns how many failed."""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT name, definition FROM app.fast_load_indexes ORDER BY name")
+            indexes = cur.fetchall()
+        self.conn.commit()
+
+        failed = 0
+        for name, definition in indexes:
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT to_regclass(%s) IS NULL", (name,))
+                    if cur.fetchone()[0]:
+                        cur.execute(definition)
+                    cur.execute("DELETE FROM app.fast_load_indexes WHERE name = %s", (name,))
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                failed += 1
+                logger.error(f"❌ Could not rebuild index {name} (kept in app.fast_load_indexes): {e}")
+        return failed
+
     def disconnect(self):
         """Close database connection."""
         if self.conn:
             self.conn.close()
             logger.info("🔌 Database connection closed")
 
-    def validate_property(self, prop: Dict[str, Any]) -> bool:
-        """Validate required fields for a property."""
-        required_fields = ['title', 'price', 'lat', 'lng', 'city', 'state']
-
-        for field in required_fields:
-            if field not in prop or prop[field] is None:
-                logger.warning(f"Missing required field: {field}")
-                return False
-
-        # Validate data types
-        try:
-            float(prop['price'])
-            float(prop['lat'])
-            float(prop['lng'])
-        except (ValueError, TypeError):
-            logger.warning("Invalid numeric values for price/lat/lng")
-            return False
-
-        return True
-
-    def normalize_property(self, prop: Dict[str, Any]) -> Dict[str, Any]:
-        """Normalize property data with defaults."""
-        defaults = {
-            'url': None,
-            'source': 'bulk_import',
-            'county': None,
-            'property_category': 'residential',
-            'property_type': 'house',
-            'bedrooms': None,
-            'bathrooms': None,
-            'square_feet': None,
-            'lot_size': None,
-            'has_pool': False,
-            'has_gym': False,
-            'pet_friendly': False,
-            'crime_rate': 'medium',
-            'flood_zone': 'X',
-            'school_rating': None,
-            'sewage_system': 'municipal',
-            'on_market': True
-        }
-
-        # Apply defaults for missing fields
-        for key, default_value in defaults.items():
-            if key not in prop or prop[key] is None:
-                prop[key] = default_value
-
-        # Convert string numbers to proper types
-        numeric_fields = ['price', 'bedrooms', 'bathrooms', 'square_feet', 'lot_size', 'school_rating']
-        for field in numeric_fields:
-            if isinstance(prop[field], str):
-                try:
-                    prop[field] = float(prop[field]) if '.' in str(prop[field]) else int(prop[field])
-                except (ValueError, TypeError):
-                    if field in ['bedrooms', 'bathrooms', 'square_feet', 'lot_size', 'school_rating']:
-                        prop[field] = None
-
-        return prop
-
-    def insert_property(self, prop: Dict[str, Any]) -> int:
-        """Insert a single property into the database."""
-        try:
-            with self.conn.cursor() as cur:
-                # Insert into deals table
-                cur.execute("""
-                    INSERT INTO app.deals (title, price, url, source)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING id
-                """, (
-                    prop['title'],
-                    prop['price'],
-                    prop['url'],
-                    prop['source']
-                ))
-
-                deal_id = cur.fetchone()[0]
-
-                # Insert location
-                cur.execute("""
-                    INSERT INTO app.deal_locations (deal_id, geom)
-                    VALUES (%s, ST_SetSRID(ST_MakePoint(%s, %s), 4326))
-                """, (deal_id, prop['lng'], prop['lat']))
-
-                return deal_id
-
-        except Exception as e:
-            logger.error(f"Failed to insert property {prop.get('title', 'Unknown')}: {e}")
-            raise
-
-    def bulk_insert_properties(self, properties: List[Dict[str, Any]], batch_size: int = 1000) -> int:
-        """Bulk insert properties with batching for performance."""
+    def _validate_and_normalize_df(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Drop rows missing REQUIRED_FIELDS or with non-numeric price/lat/lng, and fill in defaults."""
+        missing = [field for field in REQUIRED_FIELDS if field not in df.columns]
+        if missing:
+            logger.warning(f"Missing required field(s): {', '.join(missing)}")
+            return df.iloc[0:0]
+
+        complete = df[REQUIRED_FIELDS].notna().all(axis=1)
+        if not complete.all():
+            logger.warning(f"Skipping {(~complete).sum()} properties missing required fields")
+        df = df[complete]
+        numbers = df[['price', 'lat', 'lng']].apply(pd.to_numeric, errors='coerce')
+        invalid = numbers.isna().any(axis=1)
+        if invalid.any():
+            logger.warning(f"Skipping {invalid.sum()} properties with invalid numeric values for price/lat/lng")
+        df = df.assign(**numbers)[~invalid]
+
+        # Defaults cover both absent columns and missing values
+        df = df.assign(**{col: default for col, default in PROPERTY_DEFAULTS.items() if col not in df.columns})
+        # Flags keep whatever the source gave; only INSERT_COLUMNS reach the database
+        return df.fillna({col: default for col, default in PROPERTY_DEFAULTS.items() if default is not None})
+
+    def _copy_insert(self, cur, rows: List[tuple]) -> List[int]:
+        """Insert INSERT_COLUMNS row tuples with one COPY per table; returns their deal ids in order."""
+        cur.execute(NEXT_DEAL_IDS_SQL, (len(rows),))
+        deal_ids = [row[0] for row in cur.fetchall()]
+
+        deals_buf = io.StringIO()
+        csv.writer(deals_buf).writerows(
+            (deal_id, title, price, url, source)
+            for deal_id, (title, price, url, source, _, _) in zip(deal_ids, rows)
+        )
+        deals_buf.seek(0)
+        cur.copy_expert(COPY_DEALS_SQL, deals_buf)
+
+        # geometry accepts EWKT as input, so the points need no function call per row
+        locations_buf = io.StringIO()
+        csv.writer(locations_buf).writerows(
+            (deal_id, f"SRID=4326;POINT({lng} {lat})")
+            for deal_id, (_, _, _, _, lng, lat) in zip(deal_ids, rows)
+        )
+        locations_buf.seek(0)
+        cur.copy_expert(COPY_LOCATIONS_SQL, locations_buf)
+
+        return deal_ids
+
+    def _values_insert(self, cur, rows: List[tuple]) -> List[int]:
+        """Insert INSERT_COLUMNS row tuples with one multi-row INSERT per table; returns their deal ids in order."""
+        deal_ids = [row[0] for row in psycopg2.extras.execute_values(
+            cur, INSERT_DEALS_VALUES_SQL, [row[:4] for row in rows], page_size=len(rows), fetch=True
+        )]
+
+        psycopg2.extras.execute_values(
+            cur, INSERT_LOCATIONS_VALUES_SQL,
+            [(deal_id, lng, lat) for deal_id, (_, _, _, _, lng, lat) in zip(deal_ids, rows)],
+            template=LOCATION_VALUES_TEMPLATE, page_size=len(rows)
+        )
+        return deal_ids
+
+    def bulk_insert_batches(self, batches: Iterable[pd.DataFrame], total_batches: Optional[int] = None) -> int:
+        """Validate and insert DataFrame batches, one transaction each; batches may be streamed."""
         total_inserted = 0
-        total_processed = len(properties)
-
-        logger.info(f"Starting bulk import of {total_processed} properties...")
+        total_processed = 0
 
-        for i in range(0, total_processed, batch_size):
-            batch = properties[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (total_processed + batch_size - 1) // batch_size
+        for batch_num, batch in enumerate(batches, 1):
+            total_processed += len(batch)
+            label = f"{batch_num}/{total_batches}" if total_batches else batch_num
 
-            logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} properties)")
+            logger.info(f"Processing batch {label} ({len(batch)} properties)")
 
             try:
                 # Validate and normalize batch
-                valid_properties = []
-                for prop in batch:
-                    if self.validate_property(prop):
-                        valid_properties.append(self.normalize_property(prop))
-
-                if not valid_properties:
+                valid = self._validate_and_normalize_df(batch)[INSERT_COLUMNS]
+                if valid.empty:
                     logger.warning(f"No valid properties in batch {batch_num}")
                     continue
 
-                # Insert batch
-                inserted_in_batch = 0
-                for prop in valid_properties:
-                    self.insert_property(prop)
-                    inserted_in_batch += 1
+                # Insert batch; missing values go to the database as NULL
+                rows = list(valid.astype(object).where(valid.notna(), None).itertuples(index=False, name=None))
+                insert = self._copy_insert if self.use_copy else self._values_insert
+                with self.conn.cursor() as cur:
+                    inserted_in_batch = len(insert(cur, rows))
 
                 self.conn.commit()
                 total_inserted += inserted_in_batch
@@ -181,29 +314,97 @@ class PropertyImporter:
         logger.info(f"🎉 Bulk import completed: {total_inserted}/{total_processed} properties inserted")
         return total_inserted
 
+    def bulk_insert_properties(self, properties: Union[pd.DataFrame, List[Dict[str, Any]]],
+                               batch_size: int = 1000) -> int:
+        """Bulk insert properties (a DataFrame or a list of dicts) with batching for performance."""
+        total = len(properties)
+
+        logger.info(f"Starting bulk import of {total} properties...")
+
+        if isinstance(properties, pd.DataFrame):
+            batches = (properties.iloc[i:i + batch_size] for i in range(0, total, batch_size))
+        else:
+            batches = _record_batches(properties, batch_size)
+        return self.bulk_insert_batches(batches, total_batches=(total + batch_size - 1) // batch_size)
+
     def import_from_csv(self, csv_file: str, batch_size: int = 1000) -> int:
         """Import properties from CSV file."""
         logger.info(f"Importing from CSV: {csv_file}")
 
         try:
-            df = pd.read_csv(csv_file)
+            # Read batch_size rows at a time so memory use does not grow with the file
+            chunks = pd.read_csv(csv_file, chunksize=batch_size, low_memory=False,
+                                 usecols=lambda col: col in CSV_COLUMNS)
 
-            # Convert DataFrame to list of dictionaries
-            properties = df.to_dict('records')
+            logger.info("Starting bulk import...")
+            with chunks:
+                return self.bulk_insert_batches(chunks)
 
-            return self.bulk_insert_properties(properties, batch_size)
+        except Exception as e:
+            logger.error(f"Failed to import CSV: {e}")
+            raise
+
+    def import_from_csv_raw(self, csv_file: str) -> int:
+        """Import properties from a CSV file with COPY into a staging table, in one transaction."""
+        logger.info(f"Importing from CSV (raw COPY): {csv_file}")
+
+        with open(csv_file, newline='', encoding='utf-8-sig') as f:
+            header = next(csv.reader(f), [])
+        missing = [field for field in REQUIRED_FIELDS if field not in header]
+        if missing:
+            logger.warning(f"Missing required field(s): {', '.join(missing)}")
+            return 0
+
+        def column_or(name, fallback):
+            return sql.Identifier(name) if name in header else sql.SQL(fallback)
+
+        create_staging = sql.SQL(CREATE_STAGING_SQL).format(
+            columns=sql.SQL(', ').join(sql.SQL('{} TEXT').format(sql.Identifier(col)) for col in header)
+        )
+        insert_from_staging = sql.SQL(INSERT_FROM_STAGING_SQL).format(
+            url=column_or('url', 'NULL'),
+            source=column_or('source', 'NULL'),
+            complete=sql.SQL(' AND ').join(
+                sql.SQL('{} IS NOT NULL').format(sql.Identifier(field)) for field in REQUIRED_FIELDS
+            )
+        )
 
+        try:
+            with self.conn.cursor() as cur, open(csv_file, 'rb') as f:
+                cur.execute(create_staging)
+                cur.copy_expert(COPY_STAGING_SQL, f)
+                staged = cur.rowcount
+                cur.execute(insert_from_staging, {'number': NUMBER_PATTERN})
+                inserted = cur.rowcount
+            self.conn.commit()
         except Exception as e:
             logger.error(f"Failed to import CSV: {e}")
+            self.conn.rollback()
             raise
 
+        if inserted < staged:
+            logger.warning(f"Skipping {staged - inserted} properties missing required fields or with invalid price/lat/lng")
+        logger.info(f"🎉 Bulk import completed: {inserted}/{staged} properties inserted")
+        return inserted
+
     def import_from_json(self, json_file: str, batch_size: int = 1000) -> int:
         """Import properties from JSON file."""
         logger.info(f"Importing from JSON: {json_file}")
 
         try:
-            with open(json_file, 'r') as f:
-                data = json.load(f)
+            with open(json_file, 'rb') as f:
+                first = f.read(1)
+                while first.isspace():
+                    first = f.read(1)
+                f.seek(0)
+
+                if first == b'[' and HAS_IJSON and os.path.getsize(json_file) > JSON_STREAM_THRESHOLD:
+                    logger.info("Streaming large JSON array...")
+                    return self.bulk_insert_batches(
+                        _record_batches(ijson.items(f, 'item', use_float=True), batch_size)
+                    )
+
+                data = orjson.loads(f.read()) if HAS_ORJSON else json.load(f)
 
             if isinstance(data, dict):
                 properties = [data]
@@ -224,7 +425,9 @@ class PropertyImporter:
 
         try:
             with self.conn.cursor() as cur:
-                cur.execute("REFRESH MATERIALIZED VIEW app.deals_enriched")
+                # CONCURRENTLY keeps the view readable meanwhile (needs the 048 row_key unique index)
+                cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY app.deals_enriched")
+                cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY app.deals_stats_mv")
                 self.conn.commit()
                 logger.info("✅ Materialized view refreshed")
         except Exception as e:
@@ -275,10 +478,15 @@ def main():
     parser.add_argument('file', help='File to import (CSV or JSON)')
     parser.add_argument('--batch-size', type=int, default=1000, help='Batch size for bulk insert')
     parser.add_argument('--no-refresh', action='store_true', help='Skip materialized view refresh')
+    parser.add_argument('--no-copy', action='store_true', help='Insert with multi-row INSERTs instead of COPY')
+    parser.add_argument('--fast-load', action='store_true',
+                        help='Drop secondary indexes during the import and rebuild them at the end (large loads)')
+    parser.add_argument('--raw-copy', action='store_true',
+                        help='Let PostgreSQL parse the CSV: COPY it into a staging table and insert from there')
 
     args = parser.parse_args()
 
-    importer = PropertyImporter()
+    importer = PropertyImporter(use_copy=not args.no_copy)
 
     try:
         file_path = Path(args.file)
@@ -287,14 +495,18 @@ def main():
             logger.error(f"File not found: {args.file}")
             return
 
-        if file_path.suffix.lower() == '.csv':
-            inserted = importer.import_from_csv(args.file, args.batch_size)
-        elif file_path.suffix.lower() == '.json':
-            inserted = importer.import_from_json(args.file, args.batch_size)
-        else:
+        if file_path.suffix.lower() not in ('.csv', '.json'):
             logger.error("Unsupported file format. Use .csv or .json")
             return
 
+        with importer.fast_load() if args.fast_load else nullcontext():
+            if file_path.suffix.lower() == '.csv' and args.raw_copy:
+                inserted = importer.import_from_csv_raw(args.file)
+            elif file_path.suffix.lower() == '.csv':
+                inserted = importer.import_from_csv(args.file, args.batch_size)
+            else:
+                inserted = importer.import_from_json(args.file, args.batch_size)
+
         if not args.no_refresh:
             importer.refresh_materialized_view()
 
@@ -4,12 +4,25 @@ Cross-reference deals with Zillow data and enrich with contact information.
 """
 
 import os
+import io
+import csv
 import logging
 import psycopg2
 import psycopg2.extras
 import requests
-from typing import List, Dict, Optional
+import numpy as np
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 from math import radians, sin, cos, sqrt, atan2
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# Optional: JIT-compiled scoring for very large candidate sets
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +41,75 @@ DB_CONFIG = {
 ZILLOW_API_KEY = os.environ.get('ZILLOW_API_KEY', 'your_api_key')
 ZILLOW_BASE_URL = 'https://api.zillow.com/webservice'
 
+# Zillow lookups are blocking HTTP calls, so this many run at once on worker threads
+ZILLOW_API_WORKERS = int(os.environ.get('ZILLOW_API_WORKERS', 16))
+
+# Deals are streamed from a server-side cursor this many rows per round trip
+DEALS_FETCH_SIZE = 1000
+
+# ZILLOW_SCORE_IN_DB=1 scores candidates in PostGIS instead of Python: they are copied
+# into a temp table and one INSERT ... SELECT scores, filters and saves the matches
+ZILLOW_SCORE_IN_DB = os.environ.get('ZILLOW_SCORE_IN_DB', '0') == '1'
+CREATE_CANDIDATES_SQL = """
+    CREATE TEMP TABLE zillow_candidates (
+        deal_id BIGINT, zillow_id TEXT, price NUMERIC,
+        lng DOUBLE PRECISION, lat DOUBLE PRECISION
+    ) ON COMMIT DROP
+"""
+COPY_CANDIDATES_SQL = "COPY zillow_candidates FROM STDIN WITH (FORMAT CSV)"
+
+# Matches are upserted on (deal_id, zillow_id) (unique since migration 049), so rerunning
+# over the same deals refreshes their scores rather than saving the pairs again
+UPSERT_MATCHES_SQL = """
+    ON CONFLICT (deal_id, zillow_id) DO UPDATE SET
+        match_score = EXCLUDED.match_score,
+        distance_meters = EXCLUDED.distance_meters,
+        price_diff_percent = EXCLUDED.price_diff_percent
+"""
+
+# Python-scored matches are COPYed into a temp table, which writes no WAL, and upserted
+# from there in one statement. Only the saved columns are staged, so no ids are drawn
+CREATE_MATCHES_STAGING_SQL = """
+    CREATE TEMP TABLE zillow_matches_stg ON COMMIT DROP AS
+    SELECT deal_id, zillow_id, match_score, distance_meters, price_diff_percent
+    FROM app.deal_zillow_matches WITH NO DATA
+"""
+COPY_MATCHES_STAGING_SQL = """
+    COPY zillow_matches_stg (deal_id, zillow_id, match_score, distance_meters, price_diff_percent)
+    FROM STDIN WITH (FORMAT CSV)
+"""
+# DISTINCT ON: an upsert may not touch the same row twice, so repeated pairs keep their best score
+MERGE_MATCHES_SQL = """
+    INSERT INTO app.deal_zillow_matches
+    (deal_id, zillow_id, match_score, distance_meters, price_diff_percent)
+    SELECT DISTINCT ON (deal_id, zillow_id) deal_id, zillow_id, match_score, distance_meters, price_diff_percent
+    FROM zillow_matches_stg
+    ORDER BY deal_id, zillow_id, match_score DESC
+""" + UPSERT_MATCHES_SQL
+
+# Same weights and threshold as calculate_match_score
+SCORE_MATCHES_SQL = """
+    INSERT INTO app.deal_zillow_matches
+    (deal_id, zillow_id, match_score, distance_meters, price_diff_percent)
+    SELECT DISTINCT ON (deal_id, zillow_id) deal_id, zillow_id, score, distance, price_diff
+    FROM (
+        SELECT z.deal_id, z.zillow_id, g.distance,
+               0.6 * GREATEST(0, 1 - g.distance / 1000)
+                 + 0.4 * CASE WHEN d.price > 0 THEN GREATEST(0, 1 - ABS(d.price - z.price) / d.price) ELSE 0 END AS score,
+               CASE WHEN d.price > 0 THEN (z.price - d.price) / d.price * 100 ELSE 0 END AS price_diff
+        FROM zillow_candidates z
+        JOIN app.deals d ON d.id = z.deal_id
+        JOIN app.deal_locations dl ON dl.deal_id = d.id
+        CROSS JOIN LATERAL (
+            SELECT ST_DistanceSphere(dl.geom, ST_SetSRID(ST_MakePoint(z.lng, z.lat), 4326)) AS distance
+        ) g
+    ) scored
+    WHERE score >= 0.5
+    ORDER BY deal_id, zillow_id, score DESC
+""" + UPSERT_MATCHES_SQL + """
+    RETURNING deal_id, zillow_id
+"""
+
 def get_db_connection():
     """Establish database connection."""
     return psycopg2.connect(**DB_CONFIG)
@@ -41,6 +123,14 @@ def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> fl
     c = 2 * atan2(sqrt(a), sqrt(1-a))
     return R * c
 
+def haversine_vec(lat1: np.ndarray, lng1: np.ndarray, lat2: np.ndarray, lng2: np.ndarray) -> np.ndarray:
+    """calculate_distance over whole arrays of point pairs at once; distances in meters."""
+    R = 6371000  # Earth's radius in meters
+    lat1, lng1, lat2, lng2 = (np.radians(a) for a in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return R * c
+
 def calculate_match_score(deal: Dict, zillow_prop: Dict) -> float:
     """Calculate match score between deal and Zillow property."""
     # Distance score (0-1, higher for closer)
@@ -54,6 +144,41 @@ def calculate_match_score(deal: Dict, zillow_prop: Dict) -> float:
     # Weighted average
     return 0.6 * distance_score + 0.4 * price_score
 
+if HAS_NUMBA:
+    @numba.njit(parallel=True, cache=True)
+    def _score_kernel(deal_lat, deal_lng, deal_price, zillow_lat, zillow_lng, zillow_price,
+                      score, distance, price_diff):
+        """score_candidates as one fused loop over the pairs, spread across cores."""
+        R = 6371000  # Earth's radius in meters
+        for i in numba.prange(score.shape[0]):
+            lat1, lat2 = np.radians(deal_lat[i]), np.radians(zillow_lat[i])
+            dlat, dlng = lat2 - lat1, np.radians(zillow_lng[i] - deal_lng[i])
+            a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2)**2
+            distance[i] = R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+            price_score = 0.0
+            price_diff[i] = 0.0
+            if deal_price[i] > 0:
+                price_score = max(0.0, 1 - abs(deal_price[i] - zillow_price[i]) / deal_price[i])
+                price_diff[i] = (zillow_price[i] - deal_price[i]) / deal_price[i] * 100
+            score[i] = 0.6 * max(0.0, 1 - distance[i] / 1000) + 0.4 * price_score
+
+def score_candidates(deal_lat: np.ndarray, deal_lng: np.ndarray, deal_price: np.ndarray,
+                     zillow_lat: np.ndarray, zillow_lng: np.ndarray, zillow_price: np.ndarray):
+    """calculate_match_score over arrays of candidate pairs; returns (score, distance in meters, price diff %)."""
+    if HAS_NUMBA:
+        score, distance, price_diff = np.empty((3, len(deal_lat)))
+        _score_kernel(deal_lat, deal_lng, deal_price, zillow_lat, zillow_lng, zillow_price,
+                      score, distance, price_diff)
+        return score, distance, price_diff
+
+    distance = haversine_vec(deal_lat, deal_lng, zillow_lat, zillow_lng)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_score = np.where(deal_price > 0, np.maximum(0, 1 - np.abs(deal_price - zillow_price) / deal_price), 0.0)
+        price_diff = np.where(deal_price > 0, (zillow_price - deal_price) / deal_price * 100, 0.0)
+    score = 0.6 * np.maximum(0, 1 - distance / 1000) + 0.4 * price_score
+    return score, distance, price_diff
+
 def search_zillow_properties(lat: float, lng: float, price: float, radius: int = 1) -> List[Dict]:
     """Search Zillow for properties near location (mock implementation)."""
     # This is a placeholder - replace with actual Zillow API call
@@ -75,8 +200,9 @@ def search_zillow_properties(lat: float, lng: float, price: float, radius: int =
         }
     ]
 
+@lru_cache(maxsize=10000)
 def fetch_zillow_contacts(zillow_id: str) -> Optional[Dict]:
-    """Fetch detailed contact info for Zillow property (mock)."""
+    """Fetch detailed contact info for Zillow property (mock); cached, so callers must not mutate the result."""
     # Placeholder for API call to get property details
     logger.info(f"Fetching contacts for Zillow ID: {zillow_id}")
     return {
@@ -86,10 +212,24 @@ def fetch_zillow_contacts(zillow_id: str) -> Optional[Dict]:
         'brokerage': 'Mock Realty'
     }
 
-def fetch_deals_with_locations(limit: int = 100) -> List[Dict]:
-    """Fetch recent deals with location data."""
+def bounded_map(pool: ThreadPoolExecutor, fn: Callable, items: Iterable) -> Iterator[Tuple]:
+    """Ordered (item, fn(item)) pairs, like pool.map but submitting at most two calls per worker
+    ahead of the consumer, so a streamed input is never read in full."""
+    pending = deque()
+    for item in items:
+        pending.append((item, pool.submit(fn, item)))
+        if len(pending) >= 2 * ZILLOW_API_WORKERS:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+def fetch_deals_with_locations(conn, limit: int = 100) -> Iterator[Dict]:
+    """Stream recent deals with location data through a server-side cursor."""
+    # price as float8 so the scoring arithmetic mixes it freely with the Zillow floats
     query = """
-    SELECT d.id, d.title, d.price, d.url, d.source, d.created_at,
+    SELECT d.id, d.title, d.price::float8 AS price, d.url, d.source, d.created_at,
            ST_X(dl.geom) as lng, ST_Y(dl.geom) as lat
     FROM app.deals d
     JOIN app.deal_locations dl ON d.id = dl.deal_id
@@ -98,109 +238,170 @@ def fetch_deals_with_locations(limit: int = 100) -> List[Dict]:
     LIMIT %s
     """
     
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute(query, (limit,))
-            return [dict(row) for row in cur.fetchall()]
+    # A named cursor keeps the result set on the server, so memory use does not grow with limit
+    with conn.cursor(name='deals_stream', cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.itersize = DEALS_FETCH_SIZE
+        cur.execute(query, (limit,))
+        for row in cur:
+            yield dict(row)
 
-def save_matches(matches: List[Dict]):
-    """Save match results to database."""
-    query = """
-    INSERT INTO app.deal_zillow_matches 
-    (deal_id, zillow_id, match_score, distance_meters, price_diff_percent)
-    VALUES (%s, %s, %s, %s, %s)
-    """
-    
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            for match in matches:
-                distance = calculate_distance(
-                    match['deal_lat'], match['deal_lng'], 
-                    match['zillow_lat'], match['zillow_lng']
-                )
-                price_diff = ((match['zillow_price'] - match['deal_price']) / match['deal_price'] * 100) if match['deal_price'] > 0 else 0
-                
-                cur.execute(query, (
-                    match['deal_id'], match['zillow_id'], match['score'],
-                    distance, price_diff
-                ))
-        conn.commit()
-
-def save_contacts(contacts: List[Dict]):
-    """Save contact information to database."""
+def match_candidates(candidates: List[Tuple[Dict, Dict]]) -> List[Dict]:
+    """Score (deal, zillow_prop) pairs in one vectorized pass and keep those over the threshold."""
+    def column(values):
+        return np.fromiter(values, dtype=np.float64, count=len(candidates))
+
+    scores, distances, price_diffs = score_candidates(
+        column(deal['lat'] for deal, _ in candidates),
+        column(deal['lng'] for deal, _ in candidates),
+        column(deal['price'] for deal, _ in candidates),
+        column(prop['lat'] for _, prop in candidates),
+        column(prop['lng'] for _, prop in candidates),
+        column(prop.get('price', 0) for _, prop in candidates)
+    )
+
+    return [
+        {
+            'deal_id': deal['id'],
+            'zillow_id': prop['zillow_id'],
+            'score': score,
+            'distance': distance,
+            'price_diff': price_diff
+        }
+        for (deal, prop), score, distance, price_diff
+        in zip(candidates, scores.tolist(), distances.tolist(), price_diffs.tolist())
+        if score >= 0.5  # Threshold
+    ]
+
+def save_matches(conn, matches: List[Dict]):
+    """Save match results (scored by match_candidates, distances and price diffs included) to database."""
+    buf = io.StringIO()
+    csv.writer(buf).writerows(
+        (match['deal_id'], match['zillow_id'], match['score'], match['distance'], match['price_diff'])
+        for match in matches
+    )
+    buf.seek(0)
+
+    with conn.cursor() as cur:
+        cur.execute(CREATE_MATCHES_STAGING_SQL)
+        cur.copy_expert(COPY_MATCHES_STAGING_SQL, buf)
+        cur.execute(MERGE_MATCHES_SQL)
+        # Drop it now so a second save in this transaction can stage again
+        cur.execute("DROP TABLE zillow_matches_stg")
+
+def score_matches_in_db(conn, candidates: List[tuple]) -> List[Dict]:
+    """Score (deal_id, zillow_id, price, lng, lat) candidates in PostGIS and save the matches; returns their ids."""
+    buf = io.StringIO()
+    csv.writer(buf).writerows(candidates)
+    buf.seek(0)
+
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(CREATE_CANDIDATES_SQL)
+        cur.copy_expert(COPY_CANDIDATES_SQL, buf)
+        cur.execute(SCORE_MATCHES_SQL)
+        matches = [dict(row) for row in cur.fetchall()]
+        # Drop it now so a second scoring pass in this transaction can stage again
+        cur.execute("DROP TABLE zillow_candidates")
+    return matches
+
+def save_contacts(conn, contacts: List[Dict]):
+    """Save contact information to database, updating the contacts already saved for a (deal, Zillow) pair."""
     query = """
-    INSERT INTO app.zillow_contacts 
+    INSERT INTO app.zillow_contacts
     (deal_id, zillow_id, agent_name, agent_phone, agent_email, brokerage)
     VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (deal_id, zillow_id) DO UPDATE SET
+        agent_name = EXCLUDED.agent_name,
+        agent_phone = EXCLUDED.agent_phone,
+        agent_email = EXCLUDED.agent_email,
+        brokerage = EXCLUDED.brokerage,
+        fetched_at = now()
     """
-    
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            for contact in contacts:
-                cur.execute(query, (
-                    contact['deal_id'], contact['zillow_id'],
-                    contact.get('agent_name'), contact.get('agent_phone'),
-                    contact.get('agent_email'), contact.get('brokerage')
-                ))
-        conn.commit()
-
-def refresh_enriched_view():
+    rows = [
+        (contact['deal_id'], contact['zillow_id'],
+         contact.get('agent_name'), contact.get('agent_phone'),
+         contact.get('agent_email'), contact.get('brokerage'))
+        for contact in contacts
+    ]
+
+    # execute_batch rather than execute_values: a multi-row upsert fails if a pair repeats
+    # within it, while execute_batch still sends page_size statements per round trip
+    with conn.cursor() as cur:
+        psycopg2.extras.execute_batch(cur, query, rows, page_size=500)
+
+def refresh_enriched_view(conn):
     """Refresh the materialized view."""
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("REFRESH MATERIALIZED VIEW app.deals_enriched")
-        conn.commit()
+    with conn.cursor() as cur:
+        # CONCURRENTLY keeps the view readable meanwhile (needs the 048 row_key unique index)
+        cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY app.deals_enriched")
+        cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY app.deals_stats_mv")
     logger.info("Refreshed deals_enriched view")
 
-def main():
-    """Main cross-referencing workflow."""
-    logger.info("Starting Zillow cross-referencing")
-    
-    deals = fetch_deals_with_locations()
-    logger.info(f"Fetched {len(deals)} deals")
-    
+def run_cross_reference(conn):
+    """Match recent deals against Zillow and save the matches and contacts; the caller commits."""
     all_matches = []
     all_contacts = []
-    
-    for deal in deals:
-        logger.info(f"Processing deal {deal['id']}: {deal['title']}")
-        
-        zillow_props = search_zillow_properties(deal['lat'], deal['lng'], deal['price'])
-        
-        for prop in zillow_props:
-            score = calculate_match_score(deal, prop)
-            if score >= 0.5:  # Threshold
-                match = {
-                    'deal_id': deal['id'],
-                    'zillow_id': prop['zillow_id'],
-                    'score': score,
-                    'deal_lat': deal['lat'],
-                    'deal_lng': deal['lng'],
-                    'zillow_lat': prop['lat'],
-                    'zillow_lng': prop['lng'],
-                    'deal_price': deal['price'],
-                    'zillow_price': prop['price']
-                }
-                all_matches.append(match)
-                
-                # Fetch contacts for top matches
-                contacts = fetch_zillow_contacts(prop['zillow_id'])
-                if contacts:
-                    contacts.update({
-                        'deal_id': deal['id'],
-                        'zillow_id': prop['zillow_id']
-                    })
-                    all_contacts.append(contacts)
-    
-    if all_matches:
-        save_matches(all_matches)
-        logger.info(f"Saved {len(all_matches)} matches")
+    deal_count = 0
+
+    with ThreadPoolExecutor(max_workers=ZILLOW_API_WORKERS) as pool:
+        searches = bounded_map(
+            pool, lambda deal: search_zillow_properties(deal['lat'], deal['lng'], deal['price']),
+            fetch_deals_with_locations(conn)
+        )
+
+        # Every (deal, Zillow property) pair, scored all at once below
+        candidates = []
+        for deal, zillow_props in searches:
+            deal_count += 1
+            logger.info(f"Processing deal {deal['id']}: {deal['title']}")
+            candidates.extend((deal, prop) for prop in zillow_props)
+
+        logger.info(f"Fetched {deal_count} deals")
+
+        if ZILLOW_SCORE_IN_DB:
+            all_matches = score_matches_in_db(conn, [
+                (deal['id'], prop['zillow_id'], prop.get('price', 0), prop['lng'], prop['lat'])
+                for deal, prop in candidates
+            ])
+            logger.info(f"Saved {len(all_matches)} matches")
+        else:
+            all_matches = match_candidates(candidates)
+            if all_matches:
+                save_matches(conn, all_matches)
+                logger.info(f"Saved {len(all_matches)} matches")
+
+        # Fetch contacts for top matches, once per Zillow property however many deals it matched
+        zillow_ids = list(dict.fromkeys(match['zillow_id'] for match in all_matches))
+        contacts_by_id = dict(zip(zillow_ids, pool.map(fetch_zillow_contacts, zillow_ids)))
+        for match in all_matches:
+            contacts = contacts_by_id[match['zillow_id']]
+            if contacts:
+                all_contacts.append({
+                    **contacts,
+                    'deal_id': match['deal_id'],
+                    'zillow_id': match['zillow_id']
+                })
     
     if all_contacts:
-        save_contacts(all_contacts)
+        save_contacts(conn, all_contacts)
         logger.info(f"Saved {len(all_contacts)} contacts")
     
-    refresh_enriched_view()
+    # Nothing new to show otherwise
+    if all_matches or all_contacts:
+        refresh_enriched_view(conn)
+
+def main():
+    """Main cross-referencing workflow."""
+    logger.info("Starting Zillow cross-referencing")
+
+    # One connection and one transaction for the whole run: matches, contacts and the
+    # view refresh commit (or roll back) together
+    conn = get_db_connection()
+    conn.autocommit = False
+    try:
+        with conn:
+            run_cross_reference(conn)
+    finally:
+        conn.close()
     logger.info("Cross-referencing completed")
 
 if __name__ == '__main__':
@@ -6,9 +6,35 @@ Generates comprehensive reports on data loading quality and completeness
 
 import json
 import os
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+# Optional: faster JSON parsing and report writing
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Optional: stream the (possibly multi-GB) data files instead of loading them whole
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+# Optional: JIT-compiled bounds check for large coordinate sets
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 # Data quality thresholds
 QUALITY_THRESHOLDS = {
@@ -31,13 +57,44 @@ QUALITY_THRESHOLDS = {
     }
 }
 
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+@lru_cache(maxsize=None)
+def _reports_dir() -> Path:
+    """The quality reports directory, created on first use only (monitors are built repeatedly by cron runs)."""
+    reports_dir = DATA_DIR / "quality_reports"
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    return reports_dir
+
+def iter_json_records(path: Path) -> Iterator[Dict]:
+    """Yield the records of a JSON array file, streamed item by item when ijson is installed."""
+    with open(path, 'rb') as f:
+        if HAS_IJSON:
+            yield from ijson.items(f, 'item', use_float=True)
+        else:
+            yield from orjson.loads(f.read()) if HAS_ORJSON else json.load(f)
+
+if HAS_NUMBA:
+    # No fastmath: it assumes no NaNs, and a NaN coordinate must count as out of bounds
+    @numba.njit(cache=True)
+    def _count_in_bounds(lon, lat, lon_min, lon_max, lat_min, lat_max):
+        """Count the points inside a lon/lat box, in one compiled loop."""
+        count = 0
+        for i in range(len(lon)):
+            count += (lon[i] >= lon_min) & (lon[i] <= lon_max) & (lat[i] >= lat_min) & (lat[i] <= lat_max)
+        return count
+else:
+    def _count_in_bounds(lon: np.ndarray, lat: np.ndarray,
+                         lon_min: float, lon_max: float, lat_min: float, lat_max: float) -> int:
+        """Count the points inside a lon/lat box."""
+        return np.count_nonzero((lon >= lon_min) & (lon <= lon_max) & (lat >= lat_min) & (lat <= lat_max))
+
 class DataQualityMonitor:
     """Monitors and reports on data quality metrics."""
 
     def __init__(self):
-        self.data_dir = Path(__file__).parent.parent / "data"
-        self.reports_dir = self.data_dir / "quality_reports"
-        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        self.data_dir = DATA_DIR
+        self.reports_dir = _reports_dir()
 
     def analyze_parcels_quality(self) -> Dict:
         """Analyze quality of parcels data."""
@@ -47,22 +104,20 @@ class DataQualityMonitor:
             return {'status': 'no_data', 'message': 'No parcels data found'}
 
         try:
-            with open(parcels_file, 'r') as f:
-                parcels = json.load(f)
-
-            if not parcels:
+            # Analyze sample of parcels (first 1000); the rest are only counted
+            sample = []
+            total_records = 0
+            for total_records, parcel in enumerate(iter_json_records(parcels_file), 1):
+                if total_records <= 1000:
+                    sample.append(parcel)
+
+            if not total_records:
                 return {'status': 'empty', 'message': 'Parcels file is empty'}
 
-            # Analyze sample of parcels (first 1000)
-            sample = parcels[:min(1000, len(parcels))]
-
             quality_metrics = {
-                'total_records': len(parcels),
+                'total_records': total_records,
                 'sample_size': len(sample),
-                'completeness': self._calculate_completeness(sample),
-                'geographic_coverage': self._analyze_geographic_coverage(sample),
-                'data_freshness': self._analyze_data_freshness(sample),
-                'field_quality': self._analyze_field_quality(sample)
+                **self._analyze_sample(sample)
             }
 
             return quality_metrics
@@ -78,13 +133,14 @@ class DataQualityMonitor:
             return {'status': 'no_data', 'message': 'No addresses data found'}
 
         try:
-            with open(addresses_file, 'r') as f:
-                addresses = json.load(f)
-
-            sample = addresses[:min(1000, len(addresses))]
+            sample = []
+            total_records = 0
+            for total_records, address in enumerate(iter_json_records(addresses_file), 1):
+                if total_records <= 1000:
+                    sample.append(address)
 
             return {
-                'total_records': len(addresses),
+                'total_records': total_records,
                 'sample_size': len(sample),
                 'address_completeness': self._calculate_address_completeness(sample),
                 'geographic_distribution': self._analyze_address_distribution(sample),
@@ -102,21 +158,25 @@ class DataQualityMonitor:
             return {'status': 'no_data', 'message': 'No tax data found'}
 
         try:
-            # Find the latest processed tax data
-            processed_files = list(tax_dir.glob("processed_tax_data_chunk_*.json"))
+            processed_files = sorted(tax_dir.glob("processed_tax_data_chunk_*.json"))
             if not processed_files:
                 return {'status': 'no_data', 'message': 'No processed tax data found'}
 
-            # Load first chunk for analysis
-            with open(processed_files[0], 'r') as f:
-                tax_data = json.load(f)
-
-            sample = tax_data[:min(500, len(tax_data))]
+            # Stream every chunk: all records are counted, the first 500 sampled
+            sample = []
+            total_records = 0
+            counties = set()
+            for chunk_file in processed_files:
+                for record in iter_json_records(chunk_file):
+                    total_records += 1
+                    counties.add(record.get('county', 'Unknown'))
+                    if len(sample) < 500:
+                        sample.append(record)
 
             return {
-                'total_records': len(tax_data),
+                'total_records': total_records,
                 'sample_size': len(sample),
-                'counties_covered': len(set(r.get('county', 'Unknown') for r in tax_data)),
+                'counties_covered': len(counties),
                 'assessment_completeness': self._calculate_tax_completeness(sample),
                 'value_distribution': self._analyze_value_distribution(sample)
             }
@@ -124,32 +184,76 @@ class DataQualityMonitor:
         except Exception as e:
             return {'status': 'error', 'message': f'Failed to analyze tax data: {e}'}
 
+    def _analyze_sample(self, records: List[Dict]) -> Dict:
+        """Completeness, geographic coverage, freshness and field quality of records, gathered in one pass."""
+        columns = defaultdict(list)
+        coords = []
+        timestamps = []  # raw last_updated strings, parsed together at the end
+        quality_issues = {
+            'null_values': 0,
+            'empty_strings': 0,
+            'invalid_formats': 0,
+            'outliers': 0
+        }
+
+        for record in records:
+            for field, value in record.items():
+                columns[field].append(value)
+                if value is None:
+                    quality_issues['null_values'] += 1
+                elif isinstance(value, str) and value.strip() == '':
+                    quality_issues['empty_strings'] += 1
+                elif field in ['price', 'sqft', 'lot_size'] and isinstance(value, (int, float)):
+                    if value < 0 or value > 100000000:  # Reasonable bounds
+                        quality_issues['outliers'] += 1
+
+            if 'lon' in record and 'lat' in record:
+                try:
+                    coords.append((float(record['lon']), float(record['lat'])))
+                except (ValueError, TypeError):
+                    pass
+
+            if isinstance(record.get('last_updated'), str):
+                timestamps.append(record['last_updated'])
+
+        return {
+            'completeness': self._completeness_from_columns(columns, len(records)) if records else {},
+            'geographic_coverage': self._geographic_coverage(coords),
+            'data_freshness': self._data_freshness(timestamps),
+            'field_quality': quality_issues
+        }
+
     def _calculate_completeness(self, records: List[Dict]) -> Dict:
         """Calculate field completeness across records."""
         if not records:
             return {}
 
-        field_counts = {}
-        total_records = len(records)
-
+        # One pass regroups the records by field; each field is then reduced as a column
+        columns = defaultdict(list)
         for record in records:
             for field, value in record.items():
-                if field not in field_counts:
-                    field_counts[field] = 0
-                if value is not None and value != '' and value != []:
-                    field_counts[field] += 1
-
-        completeness = {}
-        for field, count in field_counts.items():
-            completeness[field] = {
-                'populated': count,
-                'percentage': count / total_records,
-                'status': 'good' if count / total_records >= QUALITY_THRESHOLDS['completeness']['min_required']
-                         else 'warning' if count / total_records >= QUALITY_THRESHOLDS['completeness']['warning']
-                         else 'critical'
-            }
+                columns[field].append(value)
+        return self._completeness_from_columns(columns, len(records))
+
+    def _completeness_from_columns(self, columns: Dict[str, List], total_records: int) -> Dict:
+        """Field completeness from the records' values grouped by field."""
+        populated = np.array([
+            np.fromiter((value is not None and value != '' and value != [] for value in values),
+                        dtype=bool, count=len(values)).sum()
+            for values in columns.values()
+        ])
+        percentages = populated / total_records
+        thresholds = QUALITY_THRESHOLDS['completeness']
+        statuses = np.select(
+            [percentages >= thresholds['min_required'], percentages >= thresholds['warning']],
+            ['good', 'warning'], default='critical'
+        )
 
-        return completeness
+        return {
+            field: {'populated': count, 'percentage': percentage, 'status': status}
+            for field, count, percentage, status
+            in zip(columns, populated.tolist(), percentages.tolist(), statuses.tolist())
+        }
 
     def _calculate_address_completeness(self, addresses: List[Dict]) -> Dict:
         """Calculate address field completeness."""
@@ -161,16 +265,8 @@ class DataQualityMonitor:
         key_fields = ['parcel_id', 'owner_name', 'situs_address', 'assessed_value']
         return self._calculate_completeness(tax_records)
 
-    def _analyze_geographic_coverage(self, records: List[Dict]) -> Dict:
-        """Analyze geographic distribution of records."""
-        coords = []
-        for record in records:
-            if 'lon' in record and 'lat' in record:
-                try:
-                    coords.append((float(record['lon']), float(record['lat'])))
-                except (ValueError, TypeError):
-                    continue
-
+    def _geographic_coverage(self, coords: List[tuple]) -> Dict:
+        """Analyze geographic distribution of (lon, lat) points."""
         if not coords:
             return {'status': 'no_coordinates', 'count': 0}
 
@@ -180,11 +276,10 @@ class DataQualityMonitor:
             'lat_min': 30.4, 'lat_max': 35.0
         }
 
-        in_georgia = 0
-        for lon, lat in coords:
-            if (ga_bounds['lon_min'] <= lon <= ga_bounds['lon_max'] and
-                ga_bounds['lat_min'] <= lat <= ga_bounds['lat_max']):
-                in_georgia += 1
+        lon, lat = np.array(coords, dtype=np.float64).T
+        in_georgia = int(_count_in_bounds(np.ascontiguousarray(lon), np.ascontiguousarray(lat),
+                                          ga_bounds['lon_min'], ga_bounds['lon_max'],
+                                          ga_bounds['lat_min'], ga_bounds['lat_max']))
 
         return {
             'total_with_coords': len(coords),
@@ -195,47 +290,33 @@ class DataQualityMonitor:
 
     def _analyze_address_distribution(self, addresses: List[Dict]) -> Dict:
         """Analyze geographic distribution of addresses."""
-        cities = {}
-        zipcodes = {}
+        cities = Counter()
+        zipcodes = Counter()
 
         for addr in addresses:
-            city = addr.get('city', 'Unknown')
-            zipcode = addr.get('postcode', 'Unknown')
-
-            cities[city] = cities.get(city, 0) + 1
-            zipcodes[zipcode] = zipcodes.get(zipcode, 0) + 1
+            cities[addr.get('city', 'Unknown')] += 1
+            zipcodes[addr.get('postcode', 'Unknown')] += 1
 
         return {
             'unique_cities': len(cities),
             'unique_zipcodes': len(zipcodes),
-            'top_cities': sorted(cities.items(), key=lambda x: x[1], reverse=True)[:10],
-            'top_zipcodes': sorted(zipcodes.items(), key=lambda x: x[1], reverse=True)[:10]
+            'top_cities': cities.most_common(10),
+            'top_zipcodes': zipcodes.most_common(10)
         }
 
-    def _analyze_data_freshness(self, records: List[Dict]) -> Dict:
-        """Analyze how fresh the data is."""
-        timestamps = []
-        for record in records:
-            if 'last_updated' in record:
-                try:
-                    # Try different timestamp formats
-                    if isinstance(record['last_updated'], str):
-                        if 'T' in record['last_updated']:
-                            dt = datetime.fromisoformat(record['last_updated'].replace('Z', '+00:00'))
-                        else:
-                            dt = datetime.strptime(record['last_updated'], '%Y-%m-%d')
-                        timestamps.append(dt)
-                except (ValueError, TypeError):
-                    continue
+    def _data_freshness(self, timestamps: List[str]) -> Dict:
+        """Analyze how fresh the data is, from raw last_updated strings."""
+        # Parsed as one array; unreadable values become NaT and drop out. Timestamps
+        # without an offset are taken as UTC, so they compare with those that have one
+        parsed = pd.to_datetime(pd.Series(timestamps, dtype=object), errors='coerce', format='mixed', utc=True)
+        ages = (pd.Timestamp.now(tz='UTC') - parsed).dt.days.dropna().astype('int64').to_numpy()
 
-        if not timestamps:
+        if not ages.size:
             return {'status': 'no_timestamps', 'message': 'No timestamp data available'}
 
-        now = datetime.now()
-        ages = [(now - ts).days for ts in timestamps]
-        avg_age = sum(ages) / len(ages)
-        max_age = max(ages)
-        min_age = min(ages)
+        avg_age = ages.mean().item()
+        max_age = ages.max().item()
+        min_age = ages.min().item()
 
         return {
             'average_age_days': avg_age,
@@ -246,27 +327,6 @@ class DataQualityMonitor:
                               else 'stale'
         }
 
-    def _analyze_field_quality(self, records: List[Dict]) -> Dict:
-        """Analyze quality of individual fields."""
-        quality_issues = {
-            'null_values': 0,
-            'empty_strings': 0,
-            'invalid_formats': 0,
-            'outliers': 0
-        }
-
-        for record in records:
-            for field, value in record.items():
-                if value is None:
-                    quality_issues['null_values'] += 1
-                elif isinstance(value, str) and value.strip() == '':
-                    quality_issues['empty_strings'] += 1
-                elif field in ['price', 'sqft', 'lot_size'] and isinstance(value, (int, float)):
-                    if value < 0 or value > 100000000:  # Reasonable bounds
-                        quality_issues['outliers'] += 1
-
-        return quality_issues
-
     def _analyze_address_format_consistency(self, addresses: List[Dict]) -> Dict:
         """Analyze consistency of address formatting."""
         formats = {'standard': 0, 'missing_street': 0, 'missing_city': 0, 'incomplete': 0}
@@ -294,28 +354,30 @@ class DataQualityMonitor:
 
     def _analyze_value_distribution(self, tax_records: List[Dict]) -> Dict:
         """Analyze distribution of assessed values."""
-        values = []
-        for record in tax_records:
-            value = record.get('assessed_value')
-            if isinstance(value, (int, float)) and value > 0:
-                values.append(value)
+        values = np.fromiter(
+            (value for value in (record.get('assessed_value') for record in tax_records)
+             if isinstance(value, (int, float)) and value > 0),
+            dtype=np.float64
+        )
 
-        if not values:
+        if not values.size:
             return {'status': 'no_values', 'message': 'No assessed values found'}
 
-        values.sort()
+        # Only these order statistics are needed, so partition around them instead of sorting
         total = len(values)
+        ranks = [0, total // 4, total // 2, 3 * total // 4, 9 * total // 10, total - 1]
+        min_value, p25, median, p75, p90, max_value = np.partition(values, ranks)[ranks].tolist()
 
         return {
             'count': total,
-            'min_value': values[0],
-            'max_value': values[-1],
-            'median_value': values[total // 2],
-            'avg_value': sum(values) / total,
+            'min_value': min_value,
+            'max_value': max_value,
+            'median_value': median,
+            'avg_value': values.mean().item(),
             'percentiles': {
-                '25th': values[total // 4],
-                '75th': values[3 * total // 4],
-                '90th': values[9 * total // 10]
+                '25th': p25,
+                '75th': p75,
+                '90th': p90
             }
         }
 
@@ -323,13 +385,18 @@ class DataQualityMonitor:
         """Generate comprehensive data quality report."""
         print("Generating comprehensive data quality report...")
 
+        # The three sources are independent file scans, so they are read concurrently
+        analyses = {
+            'parcels': self.analyze_parcels_quality,
+            'addresses': self.analyze_addresses_quality,
+            'tax_assessors': self.analyze_tax_data_quality
+        }
+        with ThreadPoolExecutor(max_workers=len(analyses)) as pool:
+            futures = {source: pool.submit(analyze) for source, analyze in analyses.items()}
+
         report = {
             'timestamp': datetime.now().isoformat(),
-            'data_sources': {
-                'parcels': self.analyze_parcels_quality(),
-                'addresses': self.analyze_addresses_quality(),
-                'tax_assessors': self.analyze_tax_data_quality()
-            },
+            'data_sources': {source: future.result() for source, future in futures.items()},
             'overall_quality_score': 0,  # Will be calculated
             'recommendations': []
         }
@@ -366,13 +433,16 @@ class DataQualityMonitor:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_file = self.reports_dir / f"quality_report_{timestamp}.json"
 
-        with open(report_file, 'w') as f:
-            json.dump(report, f, indent=2, default=str)
+        if HAS_ORJSON:
+            content = orjson.dumps(report, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                                   | orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            content = json.dumps(report, indent=2, default=str).encode()
+        report_file.write_bytes(content)
 
         # Also save latest report
         latest_file = self.reports_dir / "latest_quality_report.json"
-        with open(latest_file, 'w') as f:
-            json.dump(report, f, indent=2, default=str)
+        latest_file.write_bytes(content)
 
         print(f"Quality report saved to {report_file}")
         return report_file
@@ -9,10 +9,18 @@ import logging
 import os
 import subprocess
 import sys
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
 
+# Optional: faster JSON for the schedule file
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +32,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Loader scripts running longer than this are killed
+SCRIPT_TIMEOUT = 3600  # 1 hour
+
 # Data refresh schedules
 REFRESH_SCHEDULES = {
     'ga_gio_parcels': {
@@ -83,8 +94,8 @@ class DataRefreshScheduler:
         """Load refresh schedule from file."""
         if self.schedule_file.exists():
             try:
-                with open(self.schedule_file, 'r') as f:
-                    saved_schedule = json.load(f)
+                with open(self.schedule_file, 'rb') as f:
+                    saved_schedule = orjson.loads(f.read()) if HAS_ORJSON else json.load(f)
                     # Update our schedule with saved data
                     for key, data in saved_schedule.items():
                         if key in REFRESH_SCHEDULES:
@@ -99,8 +110,12 @@ class DataRefreshScheduler:
     def save_schedule(self):
         """Save current schedule to file."""
         self.schedule_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.schedule_file, 'w') as f:
-            json.dump(REFRESH_SCHEDULES, f, indent=2, default=str)
+        if HAS_ORJSON:
+            # datetimes are written in ISO 8601, which is_time_to_run parses back
+            self.schedule_file.write_bytes(orjson.dumps(REFRESH_SCHEDULES, default=str, option=orjson.OPT_INDENT_2))
+        else:
+            with open(self.schedule_file, 'w') as f:
+                json.dump(REFRESH_SCHEDULES, f, indent=2, default=str)
         logger.info("Saved refresh schedule to file")
 
     def initialize_schedule(self):
@@ -159,23 +174,32 @@ class DataRefreshScheduler:
         logger.info(f"Starting script: {script_name}")
 
         try:
-            # Run the script
-            result = subprocess.run(
+            # Run the script, logging its output (stdout and stderr interleaved) line by line
+            # as it arrives rather than buffering an hour of progress output in memory
+            process = subprocess.Popen(
                 [sys.executable, str(script_path)],
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
-                timeout=3600  # 1 hour timeout
+                bufsize=1
             )
+            reader = threading.Thread(target=self._log_output, args=(script_name, process.stdout), daemon=True)
+            reader.start()
 
-            if result.returncode == 0:
+            try:
+                returncode = process.wait(timeout=SCRIPT_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                raise
+            finally:
+                reader.join()
+
+            if returncode == 0:
                 logger.info(f"Script completed successfully: {script_name}")
-                if result.stdout:
-                    logger.info(f"Script output: {result.stdout}")
                 return True
             else:
-                logger.error(f"Script failed: {script_name}")
-                if result.stderr:
-                    logger.error(f"Script error: {result.stderr}")
+                logger.error(f"Script failed: {script_name} (exit code {returncode})")
                 return False
 
         except subprocess.TimeoutExpired:
@@ -185,6 +209,12 @@ class DataRefreshScheduler:
             logger.error(f"Script execution error: {script_name} - {e}")
             return False
 
+    def _log_output(self, script_name: str, stream):
+        """Log each line a script writes until it closes its output."""
+        with stream:
+            for line in stream:
+                logger.info(f"[{script_name}] {line.rstrip()}")
+
     def update_schedule_after_run(self, schedule_key: str, success: bool):
         """Update schedule after a job run."""
         schedule = REFRESH_SCHEDULES[schedule_key]
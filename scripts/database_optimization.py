@@ -59,6 +59,7 @@ def analyze_tables(conn):
         'app.parcels',
         'app.addresses',
         'app.deals',
+        'app.deals_enriched',
         'app.deal_locations',
         'app.deal_attributes',
         'app.deal_zillow_matches',
@@ -86,6 +87,7 @@ def refresh_materialized_views(conn):
 
     views_to_refresh = [
         'app.deals_enriched',
+        'app.deals_stats_mv',  # aggregates deals_enriched, so refresh it after
         'app.deals_from_addresses',
         'app.parcel_summary',
         'app.market_stats'
@@ -264,6 +264,7 @@ def refresh_views(conn):
     with conn.cursor() as cur:
         cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY app.deals_from_addresses;")
         cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY app.deals_enriched;")
+        cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY app.deals_stats_mv;")
     conn.commit()
 
 
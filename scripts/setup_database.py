@@ -213,6 +213,7 @@ def refresh_materialized_view():
     try:
         with conn.cursor() as cur:
             cur.execute("REFRESH MATERIALIZED VIEW app.deals_enriched")
+            cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY app.deals_stats_mv")
             conn.commit()
             print("Materialized view refreshed successfully!")
             return True
@@ -4,7 +4,10 @@ Unit tests for cross_reference_zillow.py
 """
 
 import unittest
-from cross_reference_zillow import calculate_distance, calculate_match_score
+from unittest import mock
+import numpy as np
+import cross_reference_zillow
+from cross_reference_zillow import HAS_NUMBA, calculate_distance, calculate_match_score, haversine_vec, score_candidates
 
 class TestCrossReference(unittest.TestCase):
     
@@ -13,6 +16,12 @@ class TestCrossReference(unittest.TestCase):
         dist = calculate_distance(40.7128, -74.0060, 34.0522, -118.2437)
         self.assertAlmostEqual(dist / 1000, 3940, delta=50)  # Within 50km
     
+    def test_haversine_vec_matches_calculate_distance(self):
+        pairs = [(40.7128, -74.0060, 34.0522, -118.2437), (33.749, -84.388, 33.759, -84.378), (10.0, 20.0, 10.0, 20.0)]
+        dists = haversine_vec(*(np.array(col) for col in zip(*pairs)))
+        for pair, dist in zip(pairs, dists):
+            self.assertAlmostEqual(dist, calculate_distance(*pair), places=6)
+    
     def test_calculate_match_score(self):
         deal = {'lat': 40.0, 'lng': -74.0, 'price': 100000}
         zillow_prop = {'lat': 40.01, 'lng': -74.01, 'price': 95000}
@@ -20,6 +29,34 @@ class TestCrossReference(unittest.TestCase):
         score = calculate_match_score(deal, zillow_prop)
         self.assertGreater(score, 0.5)  # Should be a good match
     
+    def test_score_candidates_matches_calculate_match_score(self):
+        deals = [{'lat': 40.0, 'lng': -74.0, 'price': 100000}, {'lat': 33.749, 'lng': -84.388, 'price': 0}]
+        props = [{'lat': 40.001, 'lng': -74.001, 'price': 95000}, {'lat': 33.75, 'lng': -84.39, 'price': 5000}]
+        scores, dists, price_diffs = score_candidates(*(
+            np.array([item[key] for item in items], dtype=float)
+            for items, key in [(deals, 'lat'), (deals, 'lng'), (deals, 'price'),
+                               (props, 'lat'), (props, 'lng'), (props, 'price')]
+        ))
+        for deal, prop, score, dist in zip(deals, props, scores, dists):
+            self.assertAlmostEqual(score, calculate_match_score(deal, prop), places=9)
+            self.assertAlmostEqual(dist, calculate_distance(deal['lat'], deal['lng'], prop['lat'], prop['lng']), places=6)
+        self.assertAlmostEqual(price_diffs[0], -5.0)
+        self.assertEqual(price_diffs[1], 0.0)
+    
+    @unittest.skipUnless(HAS_NUMBA, 'numba is not installed')
+    def test_numba_kernel_matches_numpy_fallback(self):
+        rng = np.random.default_rng(0)
+        n = 1000
+        deal_lat, deal_lng = rng.uniform(30, 35, n), rng.uniform(-86, -81, n)
+        deal_price = np.where(rng.random(n) < 0.1, 0.0, rng.uniform(50000, 500000, n))
+        columns = (deal_lat, deal_lng, deal_price, deal_lat + rng.normal(0, 0.01, n),
+                   deal_lng + rng.normal(0, 0.01, n), deal_price * rng.uniform(0.5, 1.5, n))
+        kernel = score_candidates(*columns)
+        with mock.patch.object(cross_reference_zillow, 'HAS_NUMBA', False):
+            fallback = score_candidates(*columns)
+        for got, expected in zip(kernel, fallback):
+            np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-6)
+    
     def test_perfect_match_score(self):
         deal = {'lat': 40.0, 'lng': -74.0, 'price': 100000}
         zillow_prop = {'lat': 40.0, 'lng': -74.0, 'price': 100000}
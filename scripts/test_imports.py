@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch insert paths of add_property.py and bulk_import.py
+
+The database tests need a scratch Postgres database: set TEST_DATABASE_URL to one
+without an app schema. The tables are created under app and dropped after; without
+PostGIS, plain ST_MakePoint/ST_SetSRID stand-ins returning EWKT text are created
+there as well.
+"""
+
+import os
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+import psycopg2
+
+import add_property
+import bulk_import
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+SCHEMA_SQL = """
+    CREATE SCHEMA app;
+    CREATE TABLE app.deals (
+        id BIGSERIAL PRIMARY KEY, title TEXT NOT NULL, price NUMERIC(12,2) NOT NULL,
+        url TEXT, source TEXT, created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    CREATE TABLE app.deal_locations (
+        id BIGSERIAL PRIMARY KEY, deal_id BIGINT NOT NULL REFERENCES app.deals (id), geom {geom} NOT NULL
+    );
+"""
+POSTGIS_STANDINS_SQL = """
+    CREATE FUNCTION app.st_makepoint(float8, float8) RETURNS text LANGUAGE sql IMMUTABLE
+        AS $$SELECT format('POINT(%s %s)', $1, $2)$$;
+    CREATE FUNCTION app.st_setsrid(text, integer) RETURNS text LANGUAGE sql IMMUTABLE
+        AS $$SELECT format('SRID=%s;%s', $2, $1)$$;
+"""
+
+def make_property(**fields):
+    return {'title': 'House', 'price': 250000, 'lat': 33.749, 'lng': -84.388,
+            'city': 'Atlanta', 'state': 'GA', **fields}
+
+class TestNormalizeProperty(unittest.TestCase):
+
+    def test_numbers_given_as_strings_are_converted(self):
+        prop = add_property.normalize_property(make_property(price='250000.50', lat='33.749', lng='-84.388'))
+        self.assertEqual((prop['price'], prop['lat'], prop['lng']), (Decimal('250000.50'), 33.749, -84.388))
+
+    def test_unparseable_numbers_are_rejected(self):
+        for field in ('price', 'lat', 'lng'):
+            self.assertIsNone(add_property.normalize_property(make_property(**{field: 'n/a'})))
+        self.assertIsNone(add_property.normalize_property(make_property(price=None)))
+@unittest.skipUnless(TEST_DATABASE_URL, 'TEST_DATABASE_URL is not set')
+class DatabaseTestCase(unittest.TestCase):
+    """Creates app.deals and app.deal_locations in the scratch database for each test class."""
+
+    @classmethod
+    def setUpClass(cls):
+        # The stand-ins live in app, so they are only found when PostGIS is missing
+        cls.db_config = dict(psycopg2.extensions.parse_dsn(TEST_DATABASE_URL), options='-c search_path=public,app')
+        cls.conn = psycopg2.connect(**cls.db_config)
+        cls.conn.autocommit = True
+        with cls.conn.cursor() as cur:
+            cur.execute("SELECT to_regnamespace('app') IS NOT NULL, to_regtype('geometry') IS NOT NULL")
+            has_app, has_postgis = cur.fetchone()
+            if has_app:
+                cls.conn.close()
+                raise unittest.SkipTest('TEST_DATABASE_URL database already has an app schema')
+            cur.execute(SCHEMA_SQL.format(geom='geometry(Point, 4326)' if has_postgis else 'text'))
+            if not has_postgis:
+                cur.execute(POSTGIS_STANDINS_SQL)
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.conn.cursor() as cur:
+            cur.execute("DROP SCHEMA app CASCADE")
+        cls.conn.close()
+
+    def setUp(self):
+        with self.conn.cursor() as cur:
+            cur.execute("TRUNCATE app.deals, app.deal_locations")
+
+    def stored(self):
+        """(title, price, url) of every stored deal with a location, in id order."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT d.title, d.price, d.url FROM app.deals d
+                JOIN app.deal_locations l ON l.deal_id = d.id ORDER BY d.id
+            """)
+            return cur.fetchall()
+
+class TestAddPropertyInsert(DatabaseTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        add_property.close_db_pool()
+        cls.patches = [mock.patch.object(add_property, 'DB_CONFIG', cls.db_config),
+                       mock.patch.object(add_property, '_db_pool', None)]
+        for patch in cls.patches:
+            patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        add_property.close_db_pool()
+        for patch in cls.patches:
+            patch.stop()
+        super().tearDownClass()
+
+    def test_copy_keeps_empty_title(self):
+        properties = [add_property.normalize_property(make_property(title=title)) for title in ('', 'Cabin')]
+        with mock.patch.object(add_property, 'COPY_THRESHOLD', 0):
+            self.assertEqual(add_property.insert_chunk(properties), 2)
+        self.assertEqual([(title, url) for title, _, url in self.stored()], [('', None), ('Cabin', None)])
+
+    def test_insert_accepts_numbers_given_as_strings(self):
+        for prepare in (True, False):
+            with self.subTest(prepare=prepare), mock.patch.object(add_property, 'DB_PREPARE_STATEMENTS', prepare):
+                self.setUp()
+                properties = [add_property.normalize_property(prop) for prop in (
+                    make_property(title='Strings', price='250000.50', lat='33.749', lng='-84.388'),
+                    make_property(title='Numbers', price=199000, lat=33.75, lng=-84.39),
+                )]
+                # Twice, so the prepared path also EXECUTEs an already PREPAREd statement
+                for _ in range(2):
+                    self.assertEqual(add_property.insert_chunk(properties), 2)
+                self.assertEqual([(title, float(price)) for title, price, _ in self.stored()],
+                                 [('Strings', 250000.5), ('Numbers', 199000.0)] * 2)
+
+class TestBulkImportInsert(DatabaseTestCase):
+
+    def test_batch_with_empty_title_is_inserted(self):
+        properties = [make_property(title=title, url=url) for title, url in (('', None), ('Cabin', 'https://x'))]
+        for use_copy in (True, False):
+            with self.subTest(use_copy=use_copy), mock.patch.object(bulk_import, 'DB_CONFIG', self.db_config):
+                self.setUp()
+                importer = bulk_import.PropertyImporter(use_copy=use_copy)
+                try:
+                    self.assertEqual(importer.bulk_insert_properties(properties), 2)
+                finally:
+                    importer.disconnect()
+                self.assertEqual([(title, url) for title, _, url in self.stored()], [('', None), ('Cabin', 'https://x')])
+
+class TestBulkImportFastLoad(DatabaseTestCase):
+    INDEXES = {'app.deals_title_idx': 'CREATE INDEX deals_title_idx ON app.deals (title)',
+               'app.deal_locations_deal_idx': 'CREATE INDEX deal_locations_deal_idx ON app.deal_locations (deal_id)'}
+
+    def setUp(self):
+        super().setUp()
+        with self.conn.cursor() as cur:
+            for definition in self.INDEXES.values():
+                cur.execute(definition)
+        patch = mock.patch.object(bulk_import, 'DB_CONFIG', self.db_config)
+        patch.start()
+        self.importer = bulk_import.PropertyImporter()
+
+    def tearDown(self):
+        self.importer.disconnect()
+        mock.patch.stopall()
+        with self.conn.cursor() as cur:
+            for name in self.INDEXES:
+                cur.execute(f"DROP INDEX IF EXISTS {name}")
+            cur.execute("DROP TABLE IF EXISTS app.fast_load_indexes")
+
+    def existing(self):
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT name FROM unnest(%s::text[]) name WHERE to_regclass(name) IS NOT NULL",
+                        (list(self.INDEXES),))
+            return {name for name, in cur.fetchall()}
+
+    def saved(self):
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT name FROM app.fast_load_indexes")
+            return {name for name, in cur.fetchall()}
+
+    def test_indexes_are_saved_while_dropped_and_rebuilt_after(self):
+        with self.importer.fast_load():
+            self.assertEqual(self.existing(), set())
+            self.assertEqual(self.saved(), set(self.INDEXES))
+            self.assertEqual(self.importer.bulk_insert_properties([make_property()]), 1)
+        self.assertEqual(self.existing(), set(self.INDEXES))
+        self.assertEqual(self.saved(), set())
+
+    def test_failed_rebuild_keeps_its_definition_and_rebuilds_the_rest(self):
+        with self.importer.fast_load():
+            with self.conn.cursor() as cur:
+                cur.execute("UPDATE app.fast_load_indexes SET definition = 'CREATE INDEX broken ON app.missing (x)'"
+                            " WHERE name = 'app.deals_title_idx'")
+        self.assertEqual(self.existing(), {'app.deal_locations_deal_idx'})
+        self.assertEqual(self.saved(), {'app.deals_title_idx'})
+
+    def test_next_fast_load_rebuilds_indexes_left_by_a_killed_run(self):
+        with self.conn.cursor() as cur:
+            cur.execute(bulk_import.CREATE_FAST_LOAD_INDEXES_SQL)
+            cur.execute("INSERT INTO app.fast_load_indexes VALUES (%s, %s)",
+                        ('app.deals_title_idx', self.INDEXES['app.deals_title_idx']))
+            cur.execute("DROP INDEX app.deals_title_idx")
+        with self.importer.fast_load():
+            pass
+        self.assertEqual(self.existing(), set(self.INDEXES))
+        self.assertEqual(self.saved(), set())
+
+if __name__ == '__main__':
+    unittest.main()